@@ -0,0 +1,210 @@
+"""Generate slideshows for every topic in a CSV or JSONL file.
+
+    GROQ_API_KEY=... python batch.py topics.csv --out decks --workers 4
+
+Each row needs a `topic` and may set any DeckRequest field (author, tone,
+num_slides, mood, animations, advance_secs, engine, fresh); missing fields take
+the command-line defaults. Every finished job is appended to
+`<out>/manifest.jsonl`, and --resume skips rows that already succeeded there.
+With --pptx each deck is also exported to PowerPoint in a process pool.
+Per-stage timings for the run are written to `<out>/metrics.prom`.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, fields
+
+from metrics import Metrics
+from pipeline import ENGINES, DeckRequest, generate_deck
+from pptx_export import write_pptx
+from render import theme_from_html
+
+MANIFEST = "manifest.jsonl"
+METRICS = "metrics.prom"
+TRUE = {"1", "true", "yes", "y", "on"}
+
+
+def load_rows(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson", ".json")):
+            return [json.loads(line) for line in f if line.strip()]
+        return list(csv.DictReader(f))
+
+
+def to_request(row, defaults):
+    """DeckRequest for one input row; raises ValueError for a field that can't be converted."""
+    row = {k.strip().lower(): v for k, v in row.items() if k and v not in (None, "")}
+    if "slides" in row and "num_slides" not in row:
+        row["num_slides"] = row.pop("slides")
+    values = dict(defaults)
+    for f in fields(DeckRequest):
+        if f.name not in row:
+            continue
+        value = row[f.name]
+        if f.type is bool and isinstance(value, str):
+            value = value.strip().lower() in TRUE
+        elif f.type is int:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{f.name} must be a whole number, got {value!r}") from None
+        elif isinstance(value, str):
+            value = value.strip()
+        values[f.name] = value
+    return DeckRequest(**values)
+
+
+def done_jobs(out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return {e["job"] for e in entries if e.get("status") == "ok"}
+
+
+class Outputs:
+    """Hands out unique `<safe_title>.html` paths and appends manifest lines."""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self._taken = set()
+        self._lock = threading.Lock()
+        os.makedirs(out_dir, exist_ok=True)
+
+    def path_for(self, title):
+        with self._lock:
+            name, n = f"{title or 'slideshow'}.html", 1
+            while name in self._taken or os.path.exists(os.path.join(self.out_dir, name)):
+                n += 1
+                name = f"{title or 'slideshow'}_{n}.html"
+            self._taken.add(name)
+            return os.path.join(self.out_dir, name)
+
+    def record(self, entry):
+        with self._lock, open(os.path.join(self.out_dir, MANIFEST), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def run_job(client, job, req, outputs, metrics=None):
+    """Returns (manifest entry, deck or None)."""
+    entry = {"job": job, "topic": req.topic, "request": asdict(req)}
+    problems = req.problems()
+    if problems:
+        return {**entry, "status": "invalid", "error": "; ".join(problems)}, None
+    started = time.monotonic()
+    try:
+        deck = generate_deck(client, req, metrics=metrics)
+    except Exception as e:
+        return {**entry, "status": "error", "error": f"{type(e).__name__}: {e}",
+                "seconds": round(time.monotonic() - started, 2)}, None
+    path = outputs.path_for(deck.title)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(deck.html)
+    return {
+        **entry, "status": "ok", "file": os.path.basename(path), "slides": len(deck.slides),
+        "engine": deck.engine, "bytes": len(deck.html.encode("utf-8")),
+        "seconds": round(time.monotonic() - started, 2),
+    }, deck
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate slideshows for every topic in a CSV or JSONL file.")
+    parser.add_argument("topics", help="CSV with a header row, or JSONL with one object per line")
+    parser.add_argument("--out", default="decks", help="output directory (default: decks)")
+    parser.add_argument("--workers", type=int, default=4, help="decks generated at the same time (default: 4)")
+    parser.add_argument("--author", default="Genis 2.0", help="default author for rows without one")
+    parser.add_argument("--tone", default="Professional")
+    parser.add_argument("--slides", type=int, default=10, dest="num_slides")
+    parser.add_argument("--engine", choices=ENGINES, default="local")
+    parser.add_argument("--no-animations", action="store_false", dest="animations")
+    parser.add_argument("--fresh", action="store_true", help="ignore cached responses")
+    parser.add_argument("--resume", action="store_true", help="skip jobs already marked ok in the manifest")
+    parser.add_argument("--pptx", action="store_true", help="also write a .pptx next to each .html")
+    parser.add_argument("--pptx-workers", type=int, default=None, help="export processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        parser.error("GROQ_API_KEY is not set")
+    from groq import Groq
+    client = Groq(api_key=api_key)
+
+    defaults = {
+        "topic": "", "author": args.author, "tone": args.tone, "num_slides": args.num_slides,
+        "engine": args.engine, "animations": args.animations, "fresh": args.fresh,
+    }
+    jobs = []
+    invalid = []
+    for n, row in enumerate(load_rows(args.topics), 1):
+        try:
+            jobs.append((n, to_request(row, defaults)))
+        except ValueError as e:
+            invalid.append({"job": n, "topic": str(row.get("topic") or ""), "row": row,
+                            "status": "invalid", "error": str(e)})
+    if args.resume:
+        skip = done_jobs(args.out)
+        jobs = [(n, req) for n, req in jobs if n not in skip]
+        invalid = [entry for entry in invalid if entry["job"] not in skip]
+    total = len(jobs) + len(invalid)
+
+    outputs = Outputs(args.out)
+    metrics = Metrics()
+    failed = 0
+    done = 0
+    exports = {}
+
+    def finish(entry):
+        nonlocal failed, done
+        outputs.record(entry)
+        failed += entry["status"] != "ok"
+        done += 1
+        detail = entry.get("file") or entry.get("error")
+        print(f"[{done}/{total}] job {entry['job']} {entry['status']}: {detail}", flush=True)
+
+    def finish_exports(wait=False):
+        for future in [f for f in exports if wait or f.done()]:
+            entry = exports.pop(future)
+            try:
+                entry["pptx"] = os.path.basename(future.result())
+            except Exception as e:
+                entry = {**entry, "status": "error", "error": f"pptx export failed: {type(e).__name__}: {e}"}
+            finish(entry)
+
+    for entry in invalid:
+        finish(entry)
+    export_pool = ProcessPoolExecutor(max_workers=args.pptx_workers) if args.pptx else None
+    try:
+        with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as pool:
+            futures = [pool.submit(run_job, client, n, req, outputs, metrics) for n, req in jobs]
+            for future in as_completed(futures):
+                entry, deck = future.result()
+                if export_pool and deck is not None:
+                    path = os.path.splitext(os.path.join(args.out, entry["file"]))[0] + ".pptx"
+                    exports[export_pool.submit(
+                        write_pptx, path, deck.slides, theme_from_html(deck.html), entry["request"]["author"]
+                    )] = entry
+                else:
+                    finish(entry)
+                finish_exports()
+        finish_exports(wait=True)
+    finally:
+        if export_pool:
+            export_pool.shutdown()
+
+    with open(os.path.join(args.out, METRICS), "w", encoding="utf-8") as f:
+        f.write(metrics.prometheus())
+    for row in metrics.summary():
+        if row["what"].startswith("deck "):
+            print(f"{row['what']}: p50 {row['p50_s']}s · p95 {row['p95_s']}s over {row['count']}")
+    print(f"{total - failed} ok, {failed} failed — manifest in {os.path.join(args.out, MANIFEST)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""In-process stand-in for the Groq chat completions API.
+
+FakeGroq answers every prompt the pipeline builds (content, repair, theme,
+shell, fragment, full deck and continuations) with plausible, deterministic
+output and streams it back in SDK-shaped chunks. Latency, token rate and
+faults are configurable:
+
+    FakeGroq(latency=0.05, tokens_per_second=800, truncate=0.5, malformed=0.2, rate_limit=0.1)
+
+Fault draws are seeded by the prompt, so a given scenario fails the same way
+on every run regardless of thread scheduling.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace as NS
+
+CHARS_PER_TOKEN = 4
+MIDDLE_TYPES = ("statement", "grid", "stats", "quote", "timeline", "split")
+
+
+class RateLimited(Exception):
+    """Looks like groq.RateLimitError to ratelimit.status_code / retry_after."""
+
+    def __init__(self, retry_after=0):
+        super().__init__("Error code: 429 - rate limit reached (injected)")
+        self.status_code = 429
+        self.response = NS(status_code=429, headers={"retry-after": str(retry_after)})
+
+
+def fake_slide(index, total, topic="the topic"):
+    kind = "title" if index == 0 else "closing" if index == total - 1 else MIDDLE_TYPES[(index - 1) % len(MIDDLE_TYPES)]
+    slide = {
+        "index": index, "type": kind, "title": f"{topic.title()} part {index + 1}", "subtitle": "",
+        "body": "", "bullets": [], "stats": [], "quote": "", "quote_author": "", "grid_items": [],
+        "timeline_items": [], "accent_word": "part",
+    }
+    if kind in ("title", "closing"):
+        slide["subtitle"] = f"What {topic} means for the next five years"
+    if kind in ("statement", "closing"):
+        slide["body"] = f"A short, punchy paragraph about {topic} that makes one clear point and stops."
+    elif kind == "split":
+        slide["bullets"] = [f"Point {n} about {topic}, kept short" for n in range(1, 4)]
+    elif kind == "grid":
+        slide["grid_items"] = [{"icon": icon, "text": f"{topic} area {n}"} for n, icon in enumerate("🚀📈🧠🔒🌍", 1)]
+    elif kind == "stats":
+        slide["stats"] = [{"value": f"{20 * n + 2}%", "label": f"of teams report change {n}"} for n in range(1, 4)]
+    elif kind == "quote":
+        slide["quote"] = f"The best way to predict the future of {topic} is to build it."
+        slide["quote_author"] = "A. Person, Founder"
+    elif kind == "timeline":
+        slide["timeline_items"] = [{"year": str(2000 + 5 * n), "event": f"Milestone {n} for {topic}"} for n in range(5)]
+    return slide
+
+
+def fake_slide_div(index, kind="statement", title=""):
+    return (f'<div class="slide slide-{kind}" id="slide-{index}"><div class="inner">'
+            f'<h2 class="slide-title">{title or f"Slide {index + 1}"}</h2>'
+            + "".join(f'<div class="row"><span class="dot"></span>Generated line {n}</div>' for n in range(4))
+            + "</div></div>")
+
+
+CSS = "\n".join(
+    f".slide-{kind} {{ display:grid; gap:{n + 1}rem; padding:6vh 8vw; background:var(--bg); color:var(--text); }}"
+    for n, kind in enumerate(("title", "closing") + MIDDLE_TYPES)
+)
+STYLE = (":root { --bg:#101418; --surface:#1b2229; --text:#f4efe6; --muted:#9aa4ad; "
+         "--accent:#e4ff3a; --accent2:#ff5e3a; }\n"
+         "/* grid: .grid-cards > .card > .card-icon + .card-label */\n"
+         "body { margin:0; overflow:hidden; font-family:'DM Sans',sans-serif; }\n"
+         ".slide { position:absolute; inset:0; opacity:0; transition:opacity .6s; }\n"
+         ".slide.active { opacity:1; }\n" + CSS)
+SCRIPT = ("const slides = document.querySelectorAll('.slide'); let cur = 0;\n"
+          "function go(n) { slides[cur].classList.remove('active'); cur = (n + slides.length) % slides.length; "
+          "slides[cur].classList.add('active'); }\n"
+          "document.addEventListener('keydown', e => { if (e.key === 'ArrowRight') go(cur + 1); "
+          "if (e.key === 'ArrowLeft') go(cur - 1); });\ngo(0);")
+THEME = {
+    "palette": {"bg": "#101418", "surface": "#1b2229", "text": "#f4efe6", "muted": "#9aa4ad",
+                "accent": "#e4ff3a", "accent2": "#ff5e3a"},
+    "fonts": {"display": "Anton", "body": "IBM Plex Sans"},
+    "motif": "grain",
+    "bullet_style": "numbered",
+}
+
+
+def _document(body):
+    return (f'<!DOCTYPE html>\n<html lang="en">\n<head><meta charset="UTF-8"><title>Deck</title>\n'
+            f"<style>\n{STYLE}\n</style>\n</head>\n<body>\n{body}\n<script>\n{SCRIPT}\n</script>\n</body>\n</html>")
+
+
+def _malform(text):
+    """The mistakes models actually make: a trailing comma, a stray fence, a cut-off last object."""
+    text = text.replace('"subtitle": ""', '"subtitle": "",,', 1)
+    cut = text.rfind('{"index"')
+    if cut > 0:
+        text = text[:cut + 40]
+    return "```json\n" + text
+
+
+class _Stream:
+    def __init__(self, text, finish_reason, prompt_tokens, first_token_delay, tokens_per_second, chunk_tokens):
+        self.text = text
+        self.finish_reason = finish_reason
+        self.prompt_tokens = prompt_tokens
+        self.first_token_delay = first_token_delay
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = chunk_tokens
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def __iter__(self):
+        step = self.chunk_tokens * CHARS_PER_TOKEN
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        for start in range(0, len(self.text), step):
+            if self.closed:
+                return
+            if self.tokens_per_second and start:
+                time.sleep(self.chunk_tokens / self.tokens_per_second)
+            delta = NS(content=self.text[start:start + step], reasoning=None)
+            yield NS(choices=[NS(delta=delta, finish_reason=None)], x_groq=None, usage=None)
+        completion_tokens = -(-len(self.text) // CHARS_PER_TOKEN)
+        usage = NS(prompt_tokens=self.prompt_tokens, completion_tokens=completion_tokens,
+                   total_tokens=self.prompt_tokens + completion_tokens)
+        yield NS(choices=[NS(delta=NS(content=None, reasoning=None), finish_reason=self.finish_reason)],
+                 x_groq=NS(usage=usage), usage=None)
+
+
+class FakeGroq:
+    """Drop-in for groq.Groq(...) as far as llm.stream_chat is concerned.
+
+    latency             seconds before the first chunk of every response
+    tokens_per_second   streaming rate after that (0 streams as fast as possible)
+    truncate            chance a content / shell / deck response stops early with finish_reason "length"
+    malformed           chance the content JSON comes back broken
+    rate_limit          chance a request is refused with a 429
+    """
+
+    def __init__(self, latency=0.0, tokens_per_second=0, chunk_tokens=4, truncate=0.0, malformed=0.0,
+                 rate_limit=0.0, seed=0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = chunk_tokens
+        self.truncate = truncate
+        self.malformed = malformed
+        self.rate_limit = rate_limit
+        self.seed = seed
+        self.chat = NS(completions=NS(create=self.create))
+        self.calls = 0
+        self.refused = 0
+        self._attempts = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _rng(self, prompt):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+            self.calls += 1
+        return random.Random(f"{self.seed}:{digest}:{attempt}")
+
+    def create(self, *, messages, model, temperature, max_tokens, stream=True, **kwargs):
+        prompt = messages[-1]["content"]
+        rng = self._rng(prompt)
+        if rng.random() < self.rate_limit:
+            with self._lock:
+                self.refused += 1
+            raise RateLimited()
+        kind, text = self.respond(prompt)
+        finish = "stop"
+        if kind == "content" and rng.random() < self.malformed:
+            text = _malform(text)
+        if kind in ("content", "shell", "deck") and rng.random() < self.truncate:
+            text, finish = self._cut(text, rng.uniform(0.4, 0.8)), "length"
+        if len(text) > max_tokens * CHARS_PER_TOKEN:
+            text, finish = self._cut(text, max_tokens * CHARS_PER_TOKEN / len(text)), "length"
+        return _Stream(text, finish, -(-len(prompt) // CHARS_PER_TOKEN), self.latency,
+                       self.tokens_per_second, self.chunk_tokens)
+
+    def _cut(self, text, fraction):
+        """Truncate, remembering the rest so a continuation prompt can pick it up."""
+        head = text[:max(int(len(text) * fraction), 1)].rstrip()
+        with self._lock:
+            self._pending[head[-80:]] = text[len(head):]
+        return head
+
+    def respond(self, prompt):
+        """(kind, full response text) for one pipeline prompt."""
+        if "your output was cut off" in prompt:
+            tail = prompt.rstrip()
+            with self._lock:
+                for key, rest in list(self._pending.items()):
+                    if tail.endswith(key):
+                        del self._pending[key]
+                        return "continuation", rest
+            return "continuation", "\n</script>\n</body>\n</html>"
+        topic = re.search(r"^(?:Topic|TOPIC): (.+)$", prompt, re.M)
+        topic = topic.group(1).strip() if topic else "the topic"
+        if "fixing a few slides" in prompt:
+            total = int(re.search(r"^Slides: (\d+)$", prompt, re.M).group(1))
+            indexes = [int(n) for n in re.findall(r"^- index (\d+):", prompt, re.M)]
+            return "repair", json.dumps([fake_slide(n, total, topic) for n in indexes], ensure_ascii=False)
+        if "presentation writer" in prompt:
+            total = int(re.search(r"Write exactly (\d+) slides", prompt).group(1))
+            return "content", json.dumps([fake_slide(n, total, topic) for n in range(total)], ensure_ascii=False, indent=2)
+        if "Invent a visual theme" in prompt:
+            return "theme", json.dumps(THEME)
+        if "SHELL of a" in prompt:
+            return "shell", _document("<!-- SLIDES -->")
+        if "You are writing ONE slide" in prompt:
+            index = int(re.search(r"^SLIDE (\d+) OF", prompt, re.M).group(1)) - 1
+            slide = json.loads(prompt[prompt.rindex("\n") + 1:])
+            return "fragment", fake_slide_div(index, slide.get("type", "statement"), slide.get("title", ""))
+        if "HTML5 slideshow" in prompt:
+            data = json.loads(prompt.split("SLIDE DATA (JSON, empty fields omitted):", 1)[1])
+            return "deck", _document("\n".join(fake_slide_div(s["index"], s["type"], s["title"]) for s in data))
+        return "other", "{}"
@@ -0,0 +1,211 @@
+"""Offline benchmarks: the full generate_deck pipeline against FakeGroq.
+
+    python bench/run.py                     # full grid, compared with bench/baseline.json
+    python bench/run.py --quick             # 3 and 10 slides only
+    python bench/run.py -k parallel         # scenarios whose name contains "parallel"
+    python bench/run.py --update-baseline   # store this run as the new baseline
+
+Each scenario runs `--repeat` times with a cold response cache and reports the
+median wall time and parse time, prompt/completion tokens, model calls,
+retries, output size and peak traced memory (from one extra run under
+tracemalloc, so tracing doesn't skew the timings). Exits 1 when a scenario
+regresses past the baseline by more than the tolerances.
+
+Baselines are machine-specific: refresh them with --update-baseline on the
+machine that does the comparing.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import ResponseCache
+from metrics import Metrics
+from pipeline import ENGINES, DeckRequest, generate_deck
+from ratelimit import CircuitBreaker, RateLimiter, Upstream
+from themes import ThemeStore
+
+from fake_groq import FakeGroq
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "baseline.json")
+SLIDE_COUNTS = (3, 5, 10, 20, 40)
+QUICK_SLIDE_COUNTS = (3, 10)
+
+# Fake model speed used by every scenario unless it overrides it.
+NETWORK = {"latency": 0.02, "tokens_per_second": 20000}
+
+# Backoff sleeps are fixed rather than jittered so 429 scenarios time the same on every run.
+RETRY_SLEEP = 0.01
+
+# Timings regress past base * (1 + tolerance) + slack; sizes and counts past base * (1 + SIZE_TOLERANCE).
+TIME_TOLERANCE = 0.25
+TIME_SLACK = 0.02
+MEMORY_SLACK_MB = 0.5
+SIZE_TOLERANCE = 0.10
+TIMED = ("seconds", "parse_seconds")
+SIZED = ("prompt_tokens", "completion_tokens", "llm_calls", "output_bytes")
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: dict
+    fake: dict = field(default_factory=dict)
+    warm: bool = False
+
+
+def scenarios(slide_counts=SLIDE_COUNTS):
+    found = []
+    for engine in ENGINES:
+        for n in slide_counts:
+            found.append(Scenario(f"{engine}/{n}", {"engine": engine, "num_slides": n}))
+        base = {"engine": engine, "num_slides": 10}
+        found += [
+            Scenario(f"{engine}/10/mood-static", {**base, "mood": "dark dramatic", "animations": False, "advance_secs": 5}),
+            Scenario(f"{engine}/10/cached", base, warm=True),
+            Scenario(f"{engine}/10/truncated", base, {"truncate": 1.0}),
+            Scenario(f"{engine}/10/malformed", base, {"malformed": 1.0}),
+            Scenario(f"{engine}/10/429", base, {"rate_limit": 0.3}),
+        ]
+    return found
+
+
+class Recorder(Metrics):
+    """Keeps the events of one run instead of writing them to the metrics file."""
+
+    def __init__(self):
+        super().__init__(path=None)
+        self.events = []
+
+    def record(self, event):
+        super().record(event)
+        self.events.append(event)
+
+
+def run_once(scenario, scratch):
+    """One generate_deck run in a private cache; returns its measurements."""
+    cache = ResponseCache(os.path.join(scratch, "cache"), 256, 200 * 1024 * 1024)
+    themes = ThemeStore(ResponseCache(os.path.join(scratch, "themes"), 16, 10 * 1024 * 1024))
+    upstream = Upstream(RateLimiter(rpm=1e6, tpm=1e9), CircuitBreaker(threshold=50), retries=6,
+                        sleep=lambda delay: time.sleep(RETRY_SLEEP))
+    client = FakeGroq(**{**NETWORK, **scenario.fake})
+    req = DeckRequest("The future of remote work in small companies", "Bench Author", **scenario.request)
+    if scenario.warm:
+        generate_deck(client, req, cache=cache, upstream=upstream, themes=themes, metrics=Recorder())
+    recorder = Recorder()
+    started = time.perf_counter()
+    deck = generate_deck(client, req, cache=cache, upstream=upstream, themes=themes, metrics=recorder)
+    seconds = time.perf_counter() - started
+    calls = [e for e in recorder.events if e["type"] == "call"]
+    return {
+        "seconds": seconds,
+        "parse_seconds": sum(e["seconds"] for e in recorder.events if e["stage"] == "parse"),
+        "prompt_tokens": sum(e["prompt_tokens"] for e in calls),
+        "completion_tokens": sum(e["completion_tokens"] for e in calls),
+        "llm_calls": len(calls),
+        "retries": sum(e["retries"] for e in calls),
+        "cache_hits": sum(e["cached"] for e in calls),
+        "output_bytes": len(deck.html.encode("utf-8")),
+        "slides": len(deck.slides),
+        "design": deck.engine,
+    }
+
+
+def measure(scenario, repeat):
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="genis-bench-") as scratch:
+        for n in range(repeat):
+            runs.append(run_once(scenario, os.path.join(scratch, str(n))))
+        tracemalloc.start()
+        try:
+            run_once(scenario, os.path.join(scratch, "traced"))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    result = dict(runs[-1])
+    for key in TIMED:
+        result[key] = round(statistics.median(r[key] for r in runs), 4)
+    result["peak_mb"] = round(peak / 1024 / 1024, 2)
+    return result
+
+
+def regressions(result, base, time_tolerance=TIME_TOLERANCE):
+    found = []
+    for key in TIMED:
+        limit = base[key] * (1 + time_tolerance) + TIME_SLACK
+        if result[key] > limit:
+            found.append(f"{key} {result[key]:.3f}s > {limit:.3f}s (baseline {base[key]:.3f}s)")
+    limit = base["peak_mb"] * (1 + time_tolerance) + MEMORY_SLACK_MB
+    if result["peak_mb"] > limit:
+        found.append(f"peak_mb {result['peak_mb']} > {limit:.2f} (baseline {base['peak_mb']})")
+    for key in SIZED:
+        limit = base[key] * (1 + SIZE_TOLERANCE)
+        if result[key] > limit:
+            found.append(f"{key} {result[key]} > {limit:.0f} (baseline {base[key]})")
+    if result["slides"] != base["slides"]:
+        found.append(f"slides {result['slides']} != baseline {base['slides']}")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the generation pipeline against a fake Groq API.")
+    parser.add_argument("-k", dest="match", default="", help="only scenarios whose name contains this")
+    parser.add_argument("--quick", action="store_true", help=f"slide counts {QUICK_SLIDE_COUNTS} only")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per scenario (default: 3)")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON (default: bench/baseline.json)")
+    parser.add_argument("--update-baseline", action="store_true", help="write results to the baseline and exit 0")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE,
+                        help=f"allowed slowdown as a fraction (default: {TIME_TOLERANCE})")
+    parser.add_argument("--out", help="also write this run's results to a JSON file")
+    args = parser.parse_args(argv)
+
+    chosen = [s for s in scenarios(QUICK_SLIDE_COUNTS if args.quick else SLIDE_COUNTS) if args.match in s.name]
+    if not chosen:
+        parser.error(f"no scenario matches {args.match!r}")
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    failed = []
+    print(f"{'scenario':<28}{'seconds':>9}{'parse':>8}{'prompt tok':>12}{'output tok':>12}"
+          f"{'calls':>7}{'retry':>7}{'KB':>8}{'peak MB':>9}  ")
+    for scenario in chosen:
+        result = results[scenario.name] = measure(scenario, max(args.repeat, 1))
+        base = baseline.get(scenario.name)
+        problems = regressions(result, base, args.tolerance) if base else []
+        failed += [f"{scenario.name}: {p}" for p in problems]
+        verdict = "REGRESSED" if problems else "ok" if base else "new"
+        print(f"{scenario.name:<28}{result['seconds']:>9.3f}{result['parse_seconds']:>8.3f}"
+              f"{result['prompt_tokens']:>12,}{result['completion_tokens']:>12,}{result['llm_calls']:>7}"
+              f"{result['retries']:>7}{result['output_bytes'] / 1024:>8.1f}{result['peak_mb']:>9.2f}  {verdict}",
+              flush=True)
+
+    payload = {"network": NETWORK, "repeat": args.repeat, "python": sys.version.split()[0], "results": results}
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+    if args.update_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                payload["results"] = {**json.load(f)["results"], **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    for line in failed:
+        print(f"REGRESSION {line}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
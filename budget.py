@@ -0,0 +1,89 @@
+import os
+from dataclasses import dataclass
+
+from llm import estimate_tokens
+
+MODEL_MAX_OUTPUT_TOKENS = int(os.environ.get("GENIS_MAX_OUTPUT_TOKENS", "65536"))
+REASONING_TOKENS = 1500
+HEADROOM = 1.3
+
+# Typical completion tokens per slide, measured on gpt-oss-120b output.
+CONTENT_TOKENS = {
+    "title": 70, "statement": 90, "split": 130, "grid": 170,
+    "quote": 100, "timeline": 190, "stats": 150, "closing": 100,
+}
+HTML_TOKENS = {
+    "title": 280, "statement": 220, "split": 400, "grid": 520,
+    "quote": 300, "timeline": 560, "stats": 460, "closing": 300,
+}
+HTML_SHELL_TOKENS = 3800
+THEME_TOKENS = 200
+AVERAGE_CONTENT_TOKENS = sum(CONTENT_TOKENS.values()) // len(CONTENT_TOKENS)
+AVERAGE_HTML_TOKENS = sum(HTML_TOKENS.values()) // len(HTML_TOKENS)
+
+
+@dataclass
+class Budget:
+    stage: str
+    expected: int
+    max_tokens: int
+    limit: int
+
+    @property
+    def fits(self):
+        return self.max_tokens <= self.limit
+
+    @property
+    def allowed(self):
+        return min(self.max_tokens, self.limit)
+
+    @property
+    def warning(self):
+        if self.fits:
+            return ""
+        return f"{self.stage} needs ~{self.max_tokens:,} output tokens but only {self.limit:,} are available per call"
+
+
+def output_limit(prompt="", tpm=None):
+    """Largest max_tokens a single call can use: the model cap, and the per-minute
+    token quota minus this prompt (a request bigger than the quota is rejected)."""
+    limit = MODEL_MAX_OUTPUT_TOKENS
+    if tpm:
+        limit = min(limit, int(tpm) - estimate_tokens(prompt))
+    return max(limit, 0)
+
+
+def _budget(stage, output_tokens, limit):
+    expected = output_tokens + REASONING_TOKENS
+    max_tokens = int(output_tokens * HEADROOM) + REASONING_TOKENS
+    max_tokens = -(-max_tokens // 256) * 256
+    return Budget(stage, expected, max_tokens, limit)
+
+
+def _types(slides):
+    return [s["type"] if isinstance(s, dict) else s for s in slides]
+
+
+def content_budget(num_slides, limit=MODEL_MAX_OUTPUT_TOKENS):
+    return _budget("Slide content", AVERAGE_CONTENT_TOKENS * num_slides, limit)
+
+
+def regen_budget(slides, limit=MODEL_MAX_OUTPUT_TOKENS):
+    return _budget("Slide repair", sum(CONTENT_TOKENS.get(t, AVERAGE_CONTENT_TOKENS) for t in _types(slides)), limit)
+
+
+def html_budget(slides, limit=MODEL_MAX_OUTPUT_TOKENS):
+    body = sum(HTML_TOKENS.get(t, AVERAGE_HTML_TOKENS) for t in _types(slides))
+    return _budget("Full AI design", HTML_SHELL_TOKENS + body, limit)
+
+
+def shell_budget(limit=MODEL_MAX_OUTPUT_TOKENS):
+    return _budget("Shared design", HTML_SHELL_TOKENS, limit)
+
+
+def fragment_budget(slide, limit=MODEL_MAX_OUTPUT_TOKENS):
+    return _budget("Slide markup", HTML_TOKENS.get(_types([slide])[0], AVERAGE_HTML_TOKENS), limit)
+
+
+def theme_budget(limit=MODEL_MAX_OUTPUT_TOKENS):
+    return _budget("Theme", THEME_TOKENS, limit)
@@ -0,0 +1,201 @@
+import gzip
+import os
+import shutil
+import socket
+import threading
+import uuid
+from collections import OrderedDict
+
+from cache import CACHE_DIR
+from pipeline import Deck
+
+DECK_DIR = os.environ.get("GENIS_DECK_DIR", os.path.join(CACHE_DIR, "decks"))
+DECK_MEMORY_MB = float(os.environ.get("GENIS_DECK_MEMORY_MB", "64"))
+DECK_DISK_MB = float(os.environ.get("GENIS_DECK_DISK_MB", "500"))
+DECK_ENTRIES = int(os.environ.get("GENIS_DECK_ENTRIES", "5000"))
+
+_HOST = socket.gethostname()
+
+
+def _alive(pid):
+    if os.name == "nt":
+        return True  # os.kill would terminate it
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class DeckStore:
+    """Generated decks shared by every session in the process.
+
+    Each deck is a small metadata dict (title, slides, engine, ...) plus its
+    HTML body, held once as UTF-8 bytes so the preview and the download share a
+    single buffer. Bodies stay in memory up to `max_memory_bytes`; least-recently
+    used ones beyond that are gzipped into a subdirectory of `directory` private
+    to this store and read back on demand.
+    The disk tier is trimmed oldest-first past `max_disk_bytes`, and at most
+    `max_entries` decks are tracked at all. Safe to share across threads.
+    """
+
+    def __init__(self, directory=DECK_DIR, max_memory_bytes=DECK_MEMORY_MB * 1024 * 1024,
+                 max_disk_bytes=DECK_DISK_MB * 1024 * 1024, max_entries=DECK_ENTRIES):
+        self.root = directory
+        self.directory = directory and os.path.join(directory, f"{_HOST}-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_entries = max_entries
+        self._meta = OrderedDict()
+        self._bodies = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._sweep()
+
+    def _sweep(self):
+        # Bodies left by an exited process can't be reached: their metadata lived in its memory.
+        # Other processes may share the root, so only this host's dead processes are cleaned up.
+        if not self.root or not os.path.isdir(self.root):
+            return
+        prefix = _HOST + "-"
+        for name in os.listdir(self.root):
+            pid = name[len(prefix):].split("-")[0]
+            if name.startswith(prefix) and pid.isdigit() and not _alive(int(pid)):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def _path(self, deck_id):
+        return os.path.join(self.directory, deck_id + ".html.gz")
+
+    def put(self, deck, **extra):
+        deck_id = uuid.uuid4().hex
+        meta = {
+            "title": deck.title, "slides": deck.slides, "engine": deck.engine,
+            "prompt_sizes": deck.prompt_sizes, **extra,
+        }
+        body = deck.html.encode("utf-8")
+        with self._lock:
+            self._meta[deck_id] = meta
+            while len(self._meta) > self.max_entries:
+                self._forget(next(iter(self._meta)))
+            spill = self._hold(deck_id, body)
+        self._spill(spill)
+        return deck_id
+
+    def meta(self, deck_id):
+        with self._lock:
+            meta = self._meta.get(deck_id)
+            if meta is not None:
+                self._meta.move_to_end(deck_id)
+            return meta
+
+    def body(self, deck_id):
+        with self._lock:
+            if deck_id not in self._meta:
+                return None
+            if deck_id in self._bodies:
+                self._bodies.move_to_end(deck_id)
+                return self._bodies[deck_id]
+        try:
+            with gzip.open(self._path(deck_id), "rb") as f:
+                body = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            if deck_id not in self._meta:
+                return body
+            spill = self._hold(deck_id, body)
+        self._spill(spill)
+        return body
+
+    def load(self, deck_id):
+        """The stored deck as a pipeline Deck, or None once it has been evicted."""
+        meta, body = self.meta(deck_id), self.body(deck_id)
+        if meta is None or body is None:
+            return None
+        return Deck(meta["slides"], body.decode("utf-8"), meta["engine"], meta["prompt_sizes"])
+
+    def discard(self, deck_id):
+        with self._lock:
+            self._forget(deck_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "decks": len(self._meta),
+                "memory_decks": len(self._bodies),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def _hold(self, deck_id, body):
+        """Keep body in memory; return the (id, body) pairs pushed out past the cap."""
+        if deck_id not in self._bodies:
+            self._memory_bytes += len(body)
+        self._bodies[deck_id] = body
+        self._bodies.move_to_end(deck_id)
+        spill = []
+        while self._memory_bytes > self.max_memory_bytes and len(self._bodies) > 1:
+            old_id, old_body = self._bodies.popitem(last=False)
+            self._memory_bytes -= len(old_body)
+            if old_id not in self._disk:
+                spill.append((old_id, old_body))
+        return spill
+
+    def _spill(self, items):
+        if not self.directory or self.max_disk_bytes <= 0:
+            return
+        for deck_id, body in items:
+            path = self._path(deck_id)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with gzip.open(path, "wb") as f:
+                    f.write(body)
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            with self._lock:
+                if deck_id not in self._meta:
+                    self._remove_file(path)
+                    continue
+                self._disk[deck_id] = size
+                self._disk_bytes += size
+                while self._disk_bytes > self.max_disk_bytes and self._disk:
+                    old_id, old_size = self._disk.popitem(last=False)
+                    self._disk_bytes -= old_size
+                    self._remove_file(self._path(old_id))
+                    if old_id not in self._bodies:
+                        self._meta.pop(old_id, None)
+
+    def _forget(self, deck_id):
+        self._meta.pop(deck_id, None)
+        body = self._bodies.pop(deck_id, None)
+        if body is not None:
+            self._memory_bytes -= len(body)
+        size = self._disk.pop(deck_id, None)
+        if size is not None:
+            self._disk_bytes -= size
+            self._remove_file(self._path(deck_id))
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_decks():
+    """The process-wide deck store shared by every Streamlit session."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = DeckStore()
+        return _default
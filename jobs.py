@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+
+from deck_store import default_decks
+from llm import Cancelled
+from pipeline import Reporter, generate_deck
+
+JOB_WORKERS = int(os.environ.get("GENIS_JOB_WORKERS", "4"))
+JOB_KEEP_SECONDS = float(os.environ.get("GENIS_JOB_KEEP_SECONDS", "3600"))
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+class Job:
+    """One generate_deck (or edit) run. Its fields are written by the worker thread and
+    read by whichever script run polls it."""
+
+    def __init__(self, request):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.state = "queued"
+        self.progress = 0
+        self.status = "⏳ Waiting for a free worker..."
+        self.preview = []
+        self.warnings = []
+        self.deck_id = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def done(self):
+        return self.state in FINISHED
+
+
+class JobReporter(Reporter):
+    def __init__(self, job):
+        self.job = job
+
+    def progress(self, percent):
+        self.job.progress = percent
+
+    def status(self, text):
+        self.job.status = text
+
+    def preview(self, slides):
+        self.job.preview = list(slides)
+
+    def warning(self, text):
+        self.job.warnings.append(text)
+
+
+class JobRunner:
+    """Process-wide pool running generations outside the Streamlit script, so a
+    rerun, refresh or dropped websocket doesn't throw away a run in progress.
+
+    Finished decks go into the deck store; jobs themselves are kept for
+    `keep_seconds` so a returning session can pick up the result.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, keep_seconds=JOB_KEEP_SECONDS, store=None):
+        self.keep_seconds = keep_seconds
+        self.store = store or default_decks()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="genis-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, client, request, task=generate_deck, **kwargs):
+        """Run task(client, request, reporter, cancel=..., **kwargs), which returns a Deck."""
+        job = Job(request)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            job.future = self._pool.submit(self._run, job, client, task, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.done:
+            return
+        job.cancel_event.set()
+        if job.future.cancel():
+            self._finish(job, "cancelled")
+
+    def _run(self, job, client, task, kwargs):
+        if job.cancel_event.is_set():
+            return self._finish(job, "cancelled")
+        job.state = "running"
+        try:
+            deck = task(client, job.request, JobReporter(job), cancel=job.cancel_event, **kwargs)
+        except Cancelled:
+            return self._finish(job, "cancelled")
+        except Exception as e:
+            job.error = e
+            return self._finish(job, "failed")
+        job.deck_id = self.store.put(deck, request=asdict(job.request))
+        self._finish(job, "done")
+
+    def _finish(self, job, state):
+        job.finished = time.time()
+        job.state = state
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [k for k, job in self._jobs.items() if job.done and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_jobs():
+    """The process-wide job runner shared by every Streamlit session."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = JobRunner()
+        return _default
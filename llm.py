@@ -0,0 +1,224 @@
+import re
+import time
+from dataclasses import asdict, dataclass, field
+
+from cache import cache_key
+
+MODEL = "openai/gpt-oss-120b"
+
+
+class Cancelled(Exception):
+    pass
+
+
+@dataclass
+class Completion:
+    text: str
+    finish_reason: str = None
+    usage: dict = field(default_factory=dict)
+    tokens: int = 0
+    cached: bool = False
+    retries: int = 0
+    continuations: int = 0
+    seconds: float = 0.0
+    first_token: float = None
+    queued: float = 0.0
+
+
+def strip_fences(text):
+    text = re.sub(r'^```[a-z]*\n?', '', text.strip())
+    return re.sub(r'\n?```$', '', text.strip())
+
+
+def _usage_dict(usage):
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+    }
+
+
+def _cancelled(cancel):
+    return cancel is not None and cancel.is_set()
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+# ── Streaming chat completion ──────────────────────────────────────────────────
+def _consume(stream, on_delta, emitted, cancel=None, started=None):
+    parts = []
+    tokens = 0
+    finish_reason = None
+    usage = {}
+    first_token = None
+    for chunk in stream:
+        if _cancelled(cancel):
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+            raise Cancelled()
+        x_groq = getattr(chunk, "x_groq", None)
+        if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+            usage = _usage_dict(x_groq.usage)
+        elif getattr(chunk, "usage", None) is not None:
+            usage = _usage_dict(chunk.usage)
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        delta = choice.delta
+        content = getattr(delta, "content", None) or ""
+        reasoning = getattr(delta, "reasoning", None) or ""
+        if content or reasoning:
+            tokens += 1
+            emitted[0] += 1
+            if first_token is None and started is not None:
+                first_token = time.monotonic() - started
+        if content:
+            parts.append(content)
+        if choice.finish_reason:
+            finish_reason = choice.finish_reason
+        if on_delta and (content or reasoning):
+            on_delta(content, tokens)
+    return Completion(strip_fences("".join(parts)), finish_reason, usage, tokens, first_token=first_token)
+
+
+def stream_chat(client, prompt, *, temperature, max_tokens, model=MODEL, on_delta=None,
+                cache=None, fresh=False, upstream=None, on_wait=None, on_retry=None, cancel=None):
+    """Stream one chat completion, calling on_delta(chunk_text, tokens) as chunks arrive.
+
+    `tokens` counts every content or reasoning chunk received, which is what the
+    model is actually spending its max_tokens budget on. Reasoning chunks are
+    reported with an empty chunk_text.
+
+    With a `cache`, a stored response for the same (model, prompt, temperature,
+    max_tokens) is replayed through on_delta in one chunk instead of calling the
+    API; `fresh=True` skips the lookup but still stores the new response.
+    Only responses that finished normally are stored.
+
+    With an `upstream` (ratelimit.Upstream), the call waits for a rate-limit
+    slot (on_wait(position, seconds) while queued) and is retried on 429/5xx
+    (on_retry(attempt, delay, error)) as long as nothing has streamed yet.
+
+    Setting the `cancel` event (threading.Event) stops the call between chunks,
+    while queued or before a retry, and raises Cancelled.
+
+    The result carries its wall time, the time spent queued or backing off
+    before the last attempt, and that attempt's time to first token.
+    """
+    if _cancelled(cancel):
+        raise Cancelled()
+    started = time.monotonic()
+    key = cache_key(model, prompt, temperature, max_tokens) if cache is not None else None
+    if key and not fresh:
+        hit = cache.get(key)
+        if hit is not None:
+            result = Completion(**hit)
+            result.cached = True
+            result.retries = result.continuations = 0
+            result.queued = 0.0
+            result.seconds = result.first_token = time.monotonic() - started
+            if on_delta and result.text:
+                on_delta(result.text, result.tokens)
+            return result
+
+    emitted = [0]
+    attempt_started = [started]
+
+    def call():
+        if _cancelled(cancel):
+            raise Cancelled()
+        emitted[0] = 0
+        attempt_started[0] = time.monotonic()
+        stream = client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        return _consume(stream, on_delta, emitted, cancel, attempt_started[0])
+
+    if upstream is None:
+        result = call()
+    else:
+        def waiting(position, seconds):
+            if _cancelled(cancel):
+                raise Cancelled()
+            if on_wait:
+                on_wait(position, seconds)
+
+        def can_retry():
+            return not emitted[0] and not _cancelled(cancel)
+
+        def spent():
+            # A call that failed before streaming anything was refused, not billed.
+            return estimate_tokens(prompt) + emitted[0] if emitted[0] else 0
+
+        reserved = estimate_tokens(prompt) + max_tokens
+        result, retries = upstream.run(call, reserved, on_wait=waiting, on_retry=on_retry, can_retry=can_retry,
+                                       spent=spent)
+        result.retries = retries
+        if result.usage.get("total_tokens"):
+            upstream.limiter.settle(reserved, result.usage["total_tokens"])
+    result.seconds = time.monotonic() - started
+    result.queued = attempt_started[0] - started
+    if key and result.text and result.finish_reason == "stop":
+        cache.put(key, asdict(result))
+    return result
+
+
+# ── Truncation recovery ────────────────────────────────────────────────────────
+CONTINUATION_TAIL_CHARS = 3000
+
+
+def stitch(head, continuation, window=2000, min_overlap=8):
+    """Append a continuation, dropping any prefix of it that repeats the end of head."""
+    for k in range(min(len(head), len(continuation), window), min_overlap - 1, -1):
+        if head.endswith(continuation[:k]):
+            return head + continuation[k:]
+    return head + continuation
+
+
+def stream_chat_complete(client, prompt, *, check, continuation, continuation_tokens, max_rounds=2,
+                         on_continue=None, on_delta=None, **kwargs):
+    """stream_chat, then recover truncated or structurally incomplete output with short follow-ups.
+
+    check(text) returns a list of problems (empty when the output is whole).
+    While the output still has problems, continuation(text, problems) builds a
+    prompt seeded with the tail of the partial output and the reply is stitched
+    onto it. Output cut by max_tokens always has problems unless check finds it
+    whole, in which case it is kept as is. on_continue(round, problems)
+    is called before each follow-up. A follow-up that restarts from scratch
+    replaces the partial output instead of being appended.
+    """
+    result = stream_chat(client, prompt, on_delta=on_delta, **kwargs)
+    for round_ in range(1, max_rounds + 1):
+        problems = check(result.text)
+        if not problems:
+            break
+        if on_continue:
+            on_continue(round_, problems)
+        offset = result.tokens
+        more = stream_chat(
+            client, continuation(result.text, problems),
+            max_tokens=continuation_tokens,
+            on_delta=(lambda chunk, tokens: on_delta(chunk, offset + tokens)) if on_delta else None,
+            **{k: v for k, v in kwargs.items() if k != "max_tokens"},
+        )
+        head = result.text
+        restarted = head[:40] and more.text.startswith(head[:40])
+        usage = {k: result.usage.get(k, 0) + more.usage.get(k, 0) for k in set(result.usage) | set(more.usage)}
+        result = Completion(
+            more.text if restarted else stitch(head, more.text),
+            more.finish_reason, usage, result.tokens + more.tokens,
+            retries=result.retries + more.retries,
+            seconds=result.seconds + more.seconds,
+            first_token=result.first_token,
+            queued=result.queued + more.queued,
+        )
+        result.continuations = round_
+    return result
@@ -0,0 +1,293 @@
+"""Per-stage latency, token and cache instrumentation for deck generation.
+
+Every generate_deck and edit_slide run appends one JSON line per model call
+and per local stage (prompt building, parsing, validation, rendering), plus one
+for the whole deck or edit, to GENIS_METRICS_FILE. The same events feed in-process histograms that
+render as Prometheus text:
+
+    python metrics.py                 # snapshot rebuilt from the JSONL file
+    python metrics.py --summary       # p50/p95 per stage and per slide count
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from cache import CACHE_DIR
+
+METRICS_FILE = os.environ.get("GENIS_METRICS_FILE", os.path.join(CACHE_DIR, "metrics.jsonl"))
+METRICS_FILE_MB = float(os.environ.get("GENIS_METRICS_MB", "20"))
+
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+SLIDE_BUCKETS = ((5, "3-5"), (10, "6-10"), (20, "11-20"), (40, "21-40"))
+RECENT = 500
+
+
+def slide_bucket(n):
+    for limit, label in SLIDE_BUCKETS:
+        if n <= limit:
+            return label
+    return f">{SLIDE_BUCKETS[-1][0]}"
+
+
+class Histogram:
+    """Cumulative buckets for Prometheus plus the last RECENT samples for exact quantiles."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+        for i, le in enumerate(BUCKETS):
+            if value <= le:
+                self.counts[i] += 1
+
+    def quantile(self, q):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def _labels(names, values):
+    return ",".join(f'{k}="{str(v)}"' for k, v in zip(names, values))
+
+
+class Metrics:
+    """Process-wide registry. Safe to share across threads."""
+
+    def __init__(self, path=METRICS_FILE, max_file_bytes=METRICS_FILE_MB * 1024 * 1024):
+        self.path = path
+        self.max_file_bytes = max_file_bytes
+        self._lock = threading.Lock()
+        self._stage_seconds = defaultdict(Histogram)
+        self._first_token = defaultdict(Histogram)
+        self._deck_seconds = defaultdict(Histogram)
+        self._edit_seconds = defaultdict(Histogram)
+        self._counters = defaultdict(float)
+
+    def trace(self, **labels):
+        return Trace(self, **labels)
+
+    def record(self, event):
+        with self._lock:
+            self._observe(event)
+            if self.path:
+                self._write(event)
+
+    def _observe(self, event):
+        kind = event.get("type")
+        if kind == "deck" and event.get("task") == "edit":
+            if event.get("status") == "ok":
+                self._edit_seconds[event.get("engine", "")].observe(event["seconds"])
+            self._counters[("edits", event.get("engine", ""), event.get("status", ""))] += 1
+            return
+        if kind == "deck":
+            key = (event.get("engine", ""), slide_bucket(event.get("slides", 0)))
+            if event.get("status") == "ok":
+                self._deck_seconds[key].observe(event["seconds"])
+            self._counters[("decks", event.get("engine", ""), event.get("status", ""))] += 1
+            return
+        stage = event.get("stage", "")
+        self._stage_seconds[stage].observe(event.get("seconds", 0.0))
+        if kind != "call":
+            return
+        counters = self._counters
+        counters[("calls", stage)] += 1
+        counters[("cache_hits", stage)] += bool(event.get("cached"))
+        counters[("retries", stage)] += event.get("retries", 0)
+        counters[("continuations", stage)] += event.get("continuations", 0)
+        counters[("queued_seconds", stage)] += event.get("queued", 0.0)
+        counters[("output_bytes", stage)] += event.get("output_bytes", 0)
+        counters[("tokens", stage, "prompt")] += event.get("prompt_tokens", 0)
+        counters[("tokens", stage, "completion")] += event.get("completion_tokens", 0)
+        counters[("cached_tokens", stage)] += event.get("cached_tokens", 0)
+        if event.get("first_token") is not None and not event.get("cached"):
+            self._first_token[stage].observe(event["first_token"])
+
+    def _write(self, event):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_file_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+
+    @classmethod
+    def replay(cls, path):
+        """Rebuild the aggregates from a JSONL file written by another process."""
+        metrics = cls(path=None)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    metrics._observe(json.loads(line))
+        return metrics
+
+    def prometheus(self):
+        out = []
+        with self._lock:
+            def histogram(name, help_, series, label_names):
+                out.append(f"# HELP {name} {help_}")
+                out.append(f"# TYPE {name} histogram")
+                for key, h in sorted(series.items()):
+                    labels = _labels(label_names, key if isinstance(key, tuple) else (key,))
+                    for le, count in zip(BUCKETS, h.counts):
+                        out.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+                    out.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+                    out.append(f"{name}_sum{{{labels}}} {h.sum:.6f}")
+                    out.append(f"{name}_count{{{labels}}} {h.count}")
+
+            def counter(name, help_, metric, label_names):
+                out.append(f"# HELP {name} {help_}")
+                out.append(f"# TYPE {name} counter")
+                for key, value in sorted(self._counters.items()):
+                    if key[0] == metric:
+                        value = f"{value:.6f}" if isinstance(value, float) and not value.is_integer() else int(value)
+                        out.append(f"{name}{{{_labels(label_names, key[1:])}}} {value}")
+
+            histogram("genis_stage_seconds", "Wall time per model call or local stage.",
+                      self._stage_seconds, ("stage",))
+            histogram("genis_first_token_seconds", "Time to first streamed token per uncached model call.",
+                      self._first_token, ("stage",))
+            histogram("genis_deck_seconds", "Wall time of successful generations by engine and slide count.",
+                      self._deck_seconds, ("engine", "slides"))
+            histogram("genis_edit_seconds", "Wall time of successful single-slide edits by engine.",
+                      self._edit_seconds, ("engine",))
+            counter("genis_decks_total", "Generations by engine and outcome.", "decks", ("engine", "status"))
+            counter("genis_edits_total", "Single-slide edits by engine and outcome.", "edits", ("engine", "status"))
+            counter("genis_llm_calls_total", "Model calls, cached or not.", "calls", ("stage",))
+            counter("genis_cache_hits_total", "Model calls answered from the response cache.", "cache_hits", ("stage",))
+            counter("genis_retries_total", "Upstream retries.", "retries", ("stage",))
+            counter("genis_continuations_total", "Follow-up calls for truncated output.", "continuations", ("stage",))
+            counter("genis_queue_seconds_total", "Time spent queued or backing off before a call.",
+                    "queued_seconds", ("stage",))
+            counter("genis_tokens_total", "Tokens billed by the API; cache hits count zero.", "tokens", ("stage", "kind"))
+            counter("genis_cached_tokens_total", "Tokens cache hits would have cost.", "cached_tokens", ("stage",))
+            counter("genis_output_bytes_total", "Bytes of model output.", "output_bytes", ("stage",))
+        return "\n".join(out) + "\n"
+
+    def summary(self):
+        """Rows of p50/p95 seconds per stage, per engine/slide count and per edit engine, for display."""
+        with self._lock:
+            rows = [
+                {"what": f"stage {stage}", "count": h.count,
+                 "p50_s": round(h.quantile(0.5), 3), "p95_s": round(h.quantile(0.95), 3),
+                 "first_token_p95_s": round(self._first_token[stage].quantile(0.95), 3)
+                 if stage in self._first_token else None}
+                for stage, h in sorted(self._stage_seconds.items()) if h.count
+            ]
+            rows += [
+                {"what": f"deck {engine} {slides} slides", "count": h.count,
+                 "p50_s": round(h.quantile(0.5), 3), "p95_s": round(h.quantile(0.95), 3),
+                 "first_token_p95_s": None}
+                for (engine, slides), h in sorted(self._deck_seconds.items()) if h.count
+            ]
+            rows += [
+                {"what": f"edit {engine}", "count": h.count,
+                 "p50_s": round(h.quantile(0.5), 3), "p95_s": round(h.quantile(0.95), 3),
+                 "first_token_p95_s": None}
+                for engine, h in sorted(self._edit_seconds.items()) if h.count
+            ]
+        return rows
+
+
+class Trace:
+    """Timings for one generation or edit; call `finish` once at the end."""
+
+    def __init__(self, metrics, **labels):
+        self.metrics = metrics
+        self.run = uuid.uuid4().hex[:12]
+        self.labels = labels
+        self.started = time.monotonic()
+        self._local = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def _event(self, kind, stage, **fields):
+        return {"ts": round(time.time(), 3), "run": self.run, "type": kind, "stage": stage, **self.labels, **fields}
+
+    @contextmanager
+    def timed(self, stage):
+        """Add the time spent in the block to a local (non-model) stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._local[stage] += time.perf_counter() - started
+
+    def call(self, stage, completion):
+        # A cache hit replays the usage of the call that filled the entry; nothing was billed this time.
+        usage = completion.usage or {}
+        billed = {} if completion.cached else usage
+        replayed = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0) if completion.cached else 0
+        self.metrics.record(self._event(
+            "call", stage,
+            seconds=round(completion.seconds, 4),
+            first_token=None if completion.first_token is None else round(completion.first_token, 4),
+            queued=round(completion.queued, 4),
+            prompt_tokens=billed.get("prompt_tokens", 0),
+            completion_tokens=billed.get("completion_tokens", 0),
+            cached_tokens=replayed,
+            retries=completion.retries,
+            continuations=completion.continuations,
+            cached=completion.cached,
+            finish_reason=completion.finish_reason,
+            output_bytes=len(completion.text.encode("utf-8")),
+        ))
+
+    def finish(self, status, **fields):
+        with self._lock:
+            local, self._local = dict(self._local), defaultdict(float)
+        for stage, seconds in local.items():
+            self.metrics.record(self._event("stage", stage, seconds=round(seconds, 4)))
+        self.metrics.record(self._event(
+            "deck", "deck", seconds=round(time.monotonic() - self.started, 4), status=status, **fields
+        ))
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_metrics():
+    """The process-wide metrics registry shared by every session and batch worker."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Metrics()
+        return _default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print generation metrics recorded in a JSONL file.")
+    parser.add_argument("file", nargs="?", default=METRICS_FILE, help=f"metrics JSONL (default: {METRICS_FILE})")
+    parser.add_argument("--summary", action="store_true", help="print p50/p95 tables instead of Prometheus text")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.file):
+        parser.error(f"{args.file} does not exist")
+    metrics = Metrics.replay(args.file)
+    if not args.summary:
+        sys.stdout.write(metrics.prometheus())
+        return 0
+    for row in metrics.summary():
+        first = f"  first token p95 {row['first_token_p95_s']}s" if row["first_token_p95_s"] is not None else ""
+        print(f"{row['what']:<32} n={row['count']:<6} p50 {row['p50_s']}s  p95 {row['p95_s']}s{first}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
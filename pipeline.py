@@ -0,0 +1,539 @@
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+
+from budget import (
+    content_budget, fragment_budget, html_budget, output_limit, regen_budget, shell_budget, theme_budget,
+)
+from cache import default_cache
+from llm import Cancelled, Completion, stream_chat, stream_chat_complete
+from metrics import default_metrics
+from prompts import PromptBuilder
+from ratelimit import default_upstream, status_code
+from render import (
+    DEFAULT_THEME, append_slides, assemble_deck, clean_fragment, count_slides, deck_problems, document_problems,
+    extract_css, local_fragment, missing_slides, parse_theme, render_deck, render_slide, replace_slide, with_local_css,
+)
+from slides import (
+    SLIDE_TYPES, SlideStreamParser, fix_slides, merge_slides, normalize_slide, parse_slides, validate_slides,
+)
+from themes import default_themes, mentions_request
+
+ENGINES = ("local", "parallel", "full")
+TONES = ["Professional", "Creative", "Educational", "Storytelling", "Technical", "Inspirational"]
+FRAGMENT_WORKERS = 6
+
+
+class GenerationError(RuntimeError):
+    pass
+
+
+@dataclass
+class DeckRequest:
+    topic: str
+    author: str
+    tone: str = "Professional"
+    num_slides: int = 10
+    mood: str = ""
+    animations: bool = True
+    advance_secs: int = 0
+    engine: str = "local"
+    fresh: bool = False
+
+    def problems(self):
+        found = []
+        if not self.topic or len(self.topic.strip()) < 10:
+            found.append("topic is too short")
+        if not self.author or len(self.author.strip()) < 2:
+            found.append("author is missing")
+        if not 3 <= self.num_slides <= 40:
+            found.append("num_slides must be between 3 and 40")
+        if self.engine not in ENGINES:
+            found.append(f"engine must be one of {', '.join(ENGINES)}")
+        return found
+
+
+@dataclass
+class Deck:
+    slides: list
+    html: str
+    engine: str
+    prompt_sizes: list = field(default_factory=list)
+
+    @property
+    def title(self):
+        return safe_title(self.slides)
+
+
+def safe_title(slides):
+    title = slides[0].get("title", "slideshow") if slides else "slideshow"
+    return re.sub(r'[^\w\s-]', '', title)[:40].replace(' ', '_')
+
+
+class Reporter:
+    """Progress hooks for generate_deck; the default reports nothing."""
+
+    def progress(self, percent):
+        pass
+
+    def status(self, text):
+        pass
+
+    def preview(self, slides):
+        pass
+
+    def warning(self, text):
+        pass
+
+
+def stream_progress(report, start, end, expected_tokens, on_text=None, every=0.25):
+    """Build an on_delta callback mapping tokens received onto progress [start:end].
+
+    Reports are throttled to one per `every` seconds; on_text(text_so_far, tokens)
+    is called on the same schedule to refresh the status line / live preview.
+    """
+    parts = []
+    last = [0.0]
+
+    def on_delta(chunk, tokens):
+        if chunk:
+            parts.append(chunk)
+        now = time.monotonic()
+        if now - last[0] < every:
+            return
+        last[0] = now
+        frac = min(tokens / max(expected_tokens, 1), 0.97)
+        report.progress(int(start + (end - start) * frac))
+        if on_text:
+            on_text("".join(parts), tokens)
+
+    return on_delta
+
+
+def _upstream_callbacks(report):
+    def show_queue(position, seconds):
+        if position > 1:
+            report.status(f"⏳ Busy right now — you're #{position} in the queue...")
+        else:
+            report.status(f"⏳ Waiting for capacity — starting in ~{max(seconds or 0, 1):.0f}s...")
+
+    def show_retry(attempt, delay, error):
+        report.status(f"🔁 Upstream busy ({status_code(error) or 'connection'}) — retrying in {delay:.0f}s (attempt {attempt + 1})...")
+
+    return {"on_wait": show_queue, "on_retry": show_retry}
+
+
+def _finished(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def generate_deck(client, req, report=None, cache=None, upstream=None, workers=FRAGMENT_WORKERS, cancel=None,
+                  slides=None, themes=None, metrics=None):
+    """Write the slide content for `req`, then design it with the requested engine.
+
+    With `slides` given the content step is skipped and only the design is
+    redone, e.g. to re-theme an existing deck with a new mood.
+
+    Designs are looked up in and saved to `themes` by mood and options: a saved
+    theme spec skips the local engine's theme call, and a saved shell skips the
+    shell call (the full engine then only writes the slides, like the parallel
+    one). Blank moods and fresh requests never reuse a design.
+
+    Every model call and local stage is timed into `metrics` (see metrics.py).
+
+    Raises GenerationError when the model output cannot be used and Cancelled
+    once the `cancel` event is set; upstream errors (CircuitOpenError, API
+    errors) propagate unchanged.
+    """
+    report = report or Reporter()
+    if slides is not None:
+        req = replace(req, num_slides=len(slides))
+    cache = cache or default_cache()
+    upstream = upstream or default_upstream()
+    author = req.author.strip()
+    themes = themes or default_themes()
+    trace = (metrics or default_metrics()).trace(engine=req.engine, slides=req.num_slides)
+    local_render = req.engine == "local"
+    parallel_render = req.engine == "parallel"
+    saved_spec = themes.get("spec", req) if local_render else None
+    saved_shell = themes.get("shell", req) if not local_render else None
+    if saved_shell:
+        parallel_render = True
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    fragment_pool = ThreadPoolExecutor(max_workers=workers)
+
+    llm_opts = {"cache": cache, "fresh": req.fresh, "upstream": upstream, "cancel": cancel}
+
+    def checkpoint():
+        if cancel is not None and cancel.is_set():
+            raise Cancelled()
+
+    live_opts = {**llm_opts, **_upstream_callbacks(report)}
+    tpm = upstream.limiter.tokens.capacity
+
+    prompts = PromptBuilder(
+        req.topic, req.tone, req.num_slides, req.author,
+        mood=req.mood, animations=req.animations, advance_secs=req.advance_secs,
+    )
+    status = "error"
+
+    try:
+        # ── Theme spec (local render) — runs alongside the content call ─────
+        theme_future = None
+        if local_render and not saved_spec:
+            with trace.timed("prompt"):
+                theme_prompt = prompts.theme()
+            theme_future = executor.submit(
+                stream_chat, client, theme_prompt, temperature=0.9,
+                max_tokens=theme_budget(output_limit(theme_prompt, tpm)).allowed, **llm_opts
+            )
+
+        # ── Shared shell (parallel slides) — runs alongside the content call ─
+        shell_jobs = []
+
+        def start_shell():
+            if saved_shell:
+                shell_jobs.append(_finished(Completion(saved_shell, "stop")))
+                return
+            with trace.timed("prompt"):
+                shell_prompt = prompts.shell()
+            shell_plan = shell_budget(output_limit(shell_prompt, tpm))
+            shell_jobs.append(executor.submit(
+                stream_chat_complete, client, shell_prompt, temperature=0.85, max_tokens=shell_plan.allowed,
+                check=document_problems, continuation=prompts.continue_shell,
+                continuation_tokens=shell_plan.allowed // 2, **llm_opts
+            ))
+
+        if parallel_render:
+            start_shell()
+
+        fragment_futures = {}
+        shell_css = []
+
+        def submit_fragments(slides):
+            if not shell_jobs or not shell_jobs[0].done() or shell_jobs[0].exception():
+                return
+            if not shell_css:
+                shell_css.append(extract_css(shell_jobs[0].result().text))
+            for slide in slides:
+                previous = fragment_futures.get(slide["index"])
+                if slide["type"] not in SLIDE_TYPES or (previous and previous[0] == slide):
+                    continue
+                if previous:
+                    previous[1].cancel()
+                with trace.timed("prompt"):
+                    fragment_prompt = prompts.fragment(slide, shell_css[0], max(req.num_slides, len(slides)))
+                fragment_futures[slide["index"]] = (slide, fragment_pool.submit(
+                    stream_chat, client, fragment_prompt, temperature=0.85,
+                    max_tokens=fragment_budget(slide, output_limit(fragment_prompt, tpm)).allowed, **llm_opts
+                ))
+
+        rendered = {}
+
+        if slides is None:
+            # ── Step 1: Generate structured slide content ────────────────────
+            report.status("🧠 Writing slide content...")
+            report.progress(10)
+
+            with trace.timed("prompt"):
+                content_prompt = prompts.content()
+
+            parser = SlideStreamParser()
+
+            def show_slides(text, tokens):
+                got = parser.slides
+                report.status(f"🧠 Writing slide content... {len(got)}/{req.num_slides} slides · {tokens:,} tokens")
+                if got:
+                    report.preview(got)
+
+            content_plan = content_budget(req.num_slides, output_limit(content_prompt, tpm))
+            if not content_plan.fits:
+                report.warning(f"{content_plan.warning} — slides that don't fit will be written in follow-up calls.")
+            content_progress = stream_progress(report, 10, 35, content_plan.expected, show_slides)
+
+            def on_content(chunk, tokens):
+                with trace.timed("parse"):
+                    new_slides = parser.feed(chunk)
+                for slide in new_slides:
+                    if local_render:
+                        with trace.timed("render"):
+                            rendered[slide["index"]] = (slide, render_slide(slide, author))
+                if parallel_render:
+                    submit_fragments(parser.slides)
+                content_progress(chunk, tokens)
+
+            content_resp = stream_chat(
+                client, content_prompt,
+                temperature=0.7,
+                max_tokens=content_plan.allowed,
+                on_delta=on_content,
+                **live_opts,
+            )
+            trace.call("content", content_resp)
+            raw = content_resp.text
+
+            with trace.timed("parse"):
+                slides_data = parser.slides or [normalize_slide(s, i) for i, s in enumerate(parse_slides(raw))]
+            if not slides_data:
+                raise GenerationError("Failed to parse slide content. Please try again.")
+            with trace.timed("parse"):
+                slides_data = fix_slides(slides_data, req.num_slides)
+
+            with trace.timed("validate"):
+                bad = validate_slides(slides_data, req.num_slides)
+            if bad:
+                report.status(f"🩹 Rewriting {len(bad)} slide(s) that didn't come out right...")
+
+                def regenerate(indexes):
+                    with trace.timed("prompt"):
+                        regen_prompt = prompts.regen(slides_data, bad, indexes)
+                    regen_plan = regen_budget(
+                        [slides_data[n] if n < len(slides_data) else "" for n in indexes],
+                        output_limit(regen_prompt, tpm),
+                    )
+                    if not regen_plan.fits and len(indexes) > 1:
+                        half = len(indexes) // 2
+                        return regenerate(indexes[:half]) + regenerate(indexes[half:])
+                    regen = stream_chat(
+                        client, regen_prompt, temperature=0.7, max_tokens=regen_plan.allowed, **live_opts
+                    )
+                    trace.call("repair", regen)
+                    with trace.timed("parse"):
+                        return parse_slides(regen.text)
+
+                slides_data = merge_slides(slides_data, regenerate(sorted(bad)), list(bad), req.num_slides)
+                usable = [s for s in slides_data if s["type"] in SLIDE_TYPES]
+                with trace.timed("parse"):
+                    slides_data = fix_slides(usable, req.num_slides)
+        else:
+            slides_data = [normalize_slide(s, i) for i, s in enumerate(slides)]
+
+        checkpoint()
+        report.progress(35)
+        report.preview([])
+
+        # ── Step 2: Generate full HTML slideshow ─────────────────────────────
+        report.status("🎨 Designing your slideshow...")
+        report.progress(45)
+
+        def show_html(text, tokens):
+            done = len(re.findall(r'class="slide[" ]', text))
+            if text:
+                report.status(f"🎨 Designing your slideshow... {done}/{len(slides_data)} slides · {tokens:,} tokens")
+            else:
+                report.status(f"🎨 Planning the design... {tokens:,} tokens")
+
+        def continue_deck(text, problems):
+            missing = set(missing_slides(text, len(slides_data)))
+            return prompts.continue_deck(text, problems, [s for s in slides_data if s["index"] in missing])
+
+        def show_continue(round_, problems):
+            report.status(f"🧵 Output was cut off — picking up where it stopped ({round_})...")
+
+        if not (local_render or parallel_render):
+            with trace.timed("prompt"):
+                html_prompt = prompts.html(slides_data, record=False)
+            html_plan = html_budget(slides_data, output_limit(html_prompt, tpm))
+            if html_plan.fits:
+                prompts.record("design", html_prompt)
+            else:
+                report.warning(f"{html_plan.warning} — switching to 🧩 AI slides in parallel for this deck.")
+                parallel_render = True
+                start_shell()
+
+        if parallel_render:
+            report.status("♻️ Reusing the saved design for this mood..." if saved_shell else "🎨 Finishing the shared design...")
+            shell_resp = shell_jobs[0].result()
+            if not saved_shell:
+                trace.call("shell", shell_resp)
+            shell_output = shell_resp.text
+            if not (shell_output.startswith("<!DOCTYPE") or shell_output.startswith("<html")):
+                raise GenerationError("Model returned invalid output. Please try again.")
+            submit_fragments(slides_data)
+            done = 0
+            for _ in as_completed(fragment_futures[s["index"]][1] for s in slides_data):
+                done += 1
+                report.status(f"🧩 Writing slides in parallel... {done}/{len(slides_data)}")
+                report.progress(45 + int(55 * done / len(slides_data)))
+            checkpoint()
+            fragments = []
+            fallbacks = 0
+            for s in slides_data:
+                try:
+                    fragment_resp = fragment_futures[s["index"]][1].result()
+                    trace.call("fragment", fragment_resp)
+                    with trace.timed("validate"):
+                        fragment = clean_fragment(fragment_resp.text, s["index"])
+                except Exception:
+                    fragment = None
+                if not fragment:
+                    fallbacks += 1
+                    with trace.timed("render"):
+                        fragment = local_fragment(s, author)
+                fragments.append(fragment)
+            if fallbacks:
+                report.warning(f"{fallbacks} slide(s) couldn't be designed by the model and use the built-in layout instead.")
+            with trace.timed("render"):
+                html_output = assemble_deck(with_local_css(shell_output) if fallbacks else shell_output, fragments,
+                                            title=slides_data[0].get("title") or "Slideshow")
+            with trace.timed("validate"):
+                shell_ok = not document_problems(shell_output)
+            if not saved_shell and shell_ok and not mentions_request(shell_output, req):
+                themes.put("shell", req, shell_output)
+
+        if local_render:
+            checkpoint()
+            theme = saved_spec
+            if not theme:
+                try:
+                    theme_resp = theme_future.result()
+                    trace.call("theme", theme_resp)
+                    with trace.timed("parse"):
+                        theme = parse_theme(theme_resp.text)
+                except Exception:
+                    theme = DEFAULT_THEME
+                if theme != DEFAULT_THEME:
+                    themes.put("spec", req, theme)
+            with trace.timed("render"):
+                html_output = render_deck(
+                    [
+                        rendered[s["index"]][1] if rendered.get(s["index"], (None,))[0] == s
+                        else render_slide(s, author)
+                        for s in slides_data
+                    ],
+                    theme,
+                    title=slides_data[0].get("title") or "Slideshow",
+                    animations=req.animations,
+                    advance_secs=req.advance_secs,
+                )
+
+        if not (local_render or parallel_render):
+            html_resp = stream_chat_complete(
+                client, html_prompt,
+                temperature=0.85,
+                max_tokens=html_plan.allowed,
+                check=lambda text: deck_problems(text, len(slides_data)),
+                continuation=continue_deck,
+                continuation_tokens=html_plan.allowed // 3,
+                on_continue=show_continue,
+                on_delta=stream_progress(report, 45, 100, html_plan.expected, show_html),
+                **live_opts,
+            )
+            trace.call("html", html_resp)
+            html_output = html_resp.text
+
+        if not (html_output.startswith("<!DOCTYPE") or html_output.startswith("<html")):
+            raise GenerationError("Model returned invalid output. Please try again.")
+
+        if not (local_render or parallel_render):
+            with trace.timed("validate"):
+                unfinished = document_problems(html_output)
+                drawn = count_slides(html_output)
+            if unfinished:
+                report.warning("The model's HTML was still incomplete after "
+                               f"{html_resp.continuations} follow-up(s) ({'; '.join(unfinished)}); it may not display correctly.")
+            if drawn < len(slides_data):
+                report.warning(f"The model only designed {drawn} of {len(slides_data)} slides; "
+                               "the rest use the built-in layout instead.")
+                with trace.timed("render"):
+                    html_output = append_slides(with_local_css(html_output),
+                                                [local_fragment(s, author) for s in slides_data[drawn:]])
+
+        report.progress(100)
+        engine = "local" if local_render else "parallel" if parallel_render else "full"
+        status = "ok"
+        return Deck(slides_data, html_output, engine, prompts.report())
+
+    except Cancelled:
+        status = "cancelled"
+        raise
+
+    finally:
+        executor.shutdown(wait=False)
+        fragment_pool.shutdown(wait=False, cancel_futures=True)
+        trace.finish(status, design="local" if local_render else "parallel" if parallel_render else "full")
+
+
+def edit_slide(client, req, report=None, *, deck, index, slide=None, instructions="",
+               cache=None, upstream=None, cancel=None, metrics=None):
+    """Change slide `index` of `deck` and redraw only that slide; returns a new Deck.
+
+    With `slide` given it is used as-is; otherwise the model rewrites the slide,
+    following `instructions` when set. Local decks redraw the slide in-process,
+    model-designed decks get one new fragment written against their own CSS.
+    Timed into `metrics` like generate_deck, as an edit rather than a deck.
+    """
+    report = report or Reporter()
+    cache = cache or default_cache()
+    upstream = upstream or default_upstream()
+    llm_opts = {"cache": cache, "upstream": upstream, "cancel": cancel, **_upstream_callbacks(report)}
+    tpm = upstream.limiter.tokens.capacity
+    slides = list(deck.slides)
+    trace = (metrics or default_metrics()).trace(engine=deck.engine, slides=len(slides), task="edit")
+    prompts = PromptBuilder(
+        req.topic, req.tone, len(slides), req.author,
+        mood=req.mood, animations=req.animations, advance_secs=req.advance_secs,
+    )
+
+    status = "error"
+    try:
+        if slide is None:
+            current = slides[index]
+            report.status(f"✍️ Rewriting slide {index + 1}...")
+            report.progress(10)
+            ask = f'rewrite "{current["title"]}" ({current["type"]})'
+            ask += f" — {instructions.strip()}" if instructions.strip() else " with fresher, stronger content"
+            regen_prompt = prompts.regen(slides, {index: [ask]}, [index])
+            regen = stream_chat(
+                client, regen_prompt, temperature=0.8, fresh=True,
+                max_tokens=regen_budget([current], output_limit(regen_prompt, tpm)).allowed, **llm_opts
+            )
+            trace.call("repair", regen)
+            with trace.timed("parse"):
+                slides = merge_slides(slides, parse_slides(regen.text), [index], len(slides))
+        else:
+            slides[index] = normalize_slide(slide, index)
+        slide = slides[index]
+        if slide["type"] not in SLIDE_TYPES:
+            raise GenerationError("The model didn't return a usable slide. Please try again.")
+
+        report.status(f"🎨 Redrawing slide {index + 1}...")
+        report.progress(60)
+        fragment = None
+        if deck.engine != "local":
+            fragment_prompt = prompts.fragment(slide, extract_css(deck.html), len(slides))
+            try:
+                fragment_resp = stream_chat(
+                    client, fragment_prompt, temperature=0.85,
+                    max_tokens=fragment_budget(slide, output_limit(fragment_prompt, tpm)).allowed, **llm_opts
+                )
+                trace.call("fragment", fragment_resp)
+                fragment = clean_fragment(fragment_resp.text, index)
+            except Cancelled:
+                raise
+            except Exception:
+                fragment = None
+        with trace.timed("render"):
+            doc = deck.html
+            if fragment is None:
+                if deck.engine == "local":
+                    fragment = render_slide(slide, req.author.strip())
+                else:
+                    report.warning(f"Slide {index + 1} couldn't be redesigned by the model and uses the built-in layout instead.")
+                    fragment = local_fragment(slide, req.author.strip())
+                    doc = with_local_css(doc)
+            html_output = replace_slide(doc, index, fragment)
+        if html_output is None:
+            raise GenerationError(f"Slide {index + 1} couldn't be found in this deck.")
+        report.progress(100)
+        status = "ok"
+        return Deck(slides, html_output, deck.engine, prompts.report())
+    except Cancelled:
+        status = "cancelled"
+        raise
+    finally:
+        trace.finish(status)
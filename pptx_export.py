@@ -0,0 +1,248 @@
+import io
+import re
+
+from pptx import Presentation
+from pptx.dml.color import RGBColor
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.enum.text import MSO_ANCHOR, PP_ALIGN
+from pptx.util import Emu, Inches, Pt
+
+from render import DEFAULT_THEME
+
+SLIDE_WIDTH = Inches(13.333)
+SLIDE_HEIGHT = Inches(7.5)
+MARGIN = Inches(0.9)
+BLANK_LAYOUT = 6
+
+
+def _rgb(color):
+    color = color.lstrip("#")
+    if len(color) == 3:
+        color = "".join(c * 2 for c in color)
+    return RGBColor.from_string(color.upper())
+
+
+class _Painter:
+    """Draws one slide's shapes in the deck theme."""
+
+    def __init__(self, slide, theme):
+        self.slide = slide
+        self.palette = theme["palette"]
+        self.fonts = theme["fonts"]
+        fill = slide.background.fill
+        fill.solid()
+        fill.fore_color.rgb = _rgb(self.palette["bg"])
+
+    def box(self, x, y, w, h, color, shape=MSO_SHAPE.RECTANGLE):
+        shape = self.slide.shapes.add_shape(shape, x, y, w, h)
+        shape.fill.solid()
+        shape.fill.fore_color.rgb = _rgb(self.palette[color])
+        shape.line.fill.background()
+        shape.shadow.inherit = False
+        return shape
+
+    def text(self, x, y, w, h, text, size, color="text", display=False, bold=False, italic=False,
+             align=PP_ALIGN.LEFT, anchor=MSO_ANCHOR.TOP, accent_word=""):
+        frame = self.slide.shapes.add_textbox(x, y, w, h).text_frame
+        frame.word_wrap = True
+        frame.vertical_anchor = anchor
+        frame.margin_left = frame.margin_right = 0
+        paragraph = frame.paragraphs[0]
+        paragraph.alignment = align
+        parts = [str(text or "")]
+        word = str(accent_word or "").strip()
+        match = re.search(re.escape(word), parts[0], re.I) if word else None
+        if match:
+            parts = [parts[0][:match.start()], match.group(), parts[0][match.end():]]
+        for i, part in enumerate(parts):
+            if not part:
+                continue
+            run = paragraph.add_run()
+            run.text = part
+            font = run.font
+            font.size = Pt(size)
+            font.bold = bold
+            font.italic = italic
+            font.name = self.fonts["display" if display else "body"]
+            font.color.rgb = _rgb(self.palette["accent" if i == 1 else color])
+        return frame
+
+    def lines(self, x, y, w, h, items, size, numbered=True):
+        frame = self.slide.shapes.add_textbox(x, y, w, h).text_frame
+        frame.word_wrap = True
+        frame.margin_left = frame.margin_right = 0
+        for i, item in enumerate(items):
+            paragraph = frame.paragraphs[0] if i == 0 else frame.add_paragraph()
+            paragraph.space_after = Pt(size * 0.6)
+            if numbered:
+                mark = paragraph.add_run()
+                mark.text = f"{i + 1:02d}   "
+                mark.font.size = Pt(size * 1.2)
+                mark.font.name = self.fonts["display"]
+                mark.font.color.rgb = _rgb(self.palette["accent"])
+            run = paragraph.add_run()
+            run.text = str(item)
+            run.font.size = Pt(size)
+            run.font.name = self.fonts["body"]
+            run.font.color.rgb = _rgb(self.palette["text"])
+        return frame
+
+
+def _width():
+    return SLIDE_WIDTH - 2 * MARGIN
+
+
+def _heading(p, slide, y=Inches(0.7), size=40):
+    p.text(MARGIN, y, _width(), Inches(1.2), slide["title"], size, display=True, accent_word=slide["accent_word"])
+
+
+def _copy(p, slide, x, y, w, h, size=20):
+    bullets = [b for b in slide["bullets"] if str(b).strip()]
+    if bullets:
+        p.lines(x, y, w, h, bullets, size)
+    elif slide["body"]:
+        p.text(x, y, w, h, slide["body"], size, color="muted")
+
+
+def _hero(p, slide, author):
+    closing = slide["type"] == "closing"
+    align = PP_ALIGN.CENTER if closing else PP_ALIGN.LEFT
+    p.text(MARGIN, Inches(1.6), _width(), Inches(2), slide["title"], 60, display=True, align=align,
+           anchor=MSO_ANCHOR.BOTTOM, accent_word=slide["accent_word"])
+    y = Inches(3.8)
+    if slide["subtitle"]:
+        p.text(MARGIN, y, _width(), Inches(0.8), slide["subtitle"], 24, color="muted", align=align)
+        y += Inches(0.9)
+    if closing:
+        _copy(p, slide, MARGIN + Inches(1.5), y, _width() - Inches(3), Inches(1.6))
+        y += Inches(1.7)
+    if author:
+        p.text(MARGIN, max(y, Inches(5.6)), _width(), Inches(0.5), f"BY {author.upper()}", 14,
+               color="accent2", align=align)
+
+
+def _statement(p, slide, author):
+    if slide["body"]:
+        p.text(MARGIN, Inches(1.4), _width(), Inches(0.6), slide["title"].upper(), 14, color="accent")
+        p.text(MARGIN, Inches(2.1), _width(), Inches(3.6), slide["body"], 40, display=True)
+        return
+    p.text(MARGIN, Inches(1.4), _width(), Inches(3), slide["title"], 54, display=True,
+           anchor=MSO_ANCHOR.MIDDLE, accent_word=slide["accent_word"])
+    _copy(p, slide, MARGIN, Inches(4.6), _width(), Inches(2.2))
+
+
+def _split(p, slide, author):
+    half = SLIDE_WIDTH // 2
+    p.box(half, 0, SLIDE_WIDTH - half, SLIDE_HEIGHT, "accent")
+    word = slide["accent_word"] or slide["title"].split(" ")[0]
+    frame = p.text(half, 0, SLIDE_WIDTH - half, SLIDE_HEIGHT, word, 88, color="bg", display=True,
+                   align=PP_ALIGN.CENTER, anchor=MSO_ANCHOR.MIDDLE)
+    frame.word_wrap = False
+    left = half - 2 * MARGIN
+    p.text(MARGIN, Inches(1), left, Inches(1.8), slide["title"], 36, display=True, accent_word=slide["accent_word"])
+    _copy(p, slide, MARGIN, Inches(3), left, Inches(3.8), size=18)
+
+
+def _grid(p, slide, author):
+    items = [g for g in slide["grid_items"] if isinstance(g, dict)]
+    if not items:
+        return _split(p, slide, author)
+    _heading(p, slide)
+    items = items[:6]
+    cols = 2 if len(items) in (1, 2, 4) else 3
+    rows = -(-len(items) // cols)
+    gap = Inches(0.3)
+    top = Inches(2.1)
+    w = (_width() - gap * (cols - 1)) // cols
+    h = min(Inches(2.2), (SLIDE_HEIGHT - top - Inches(0.6) - gap * (rows - 1)) // rows)
+    for i, item in enumerate(items):
+        x = MARGIN + (i % cols) * (w + gap)
+        y = top + (i // cols) * (h + gap)
+        card = p.box(x, y, w, h, "surface", MSO_SHAPE.ROUNDED_RECTANGLE)
+        card.adjustments[0] = 0.08
+        inset = Inches(0.25)
+        p.text(x + inset, y + inset, w - 2 * inset, Inches(0.6), item.get("icon"), 26)
+        p.text(x + inset, y + inset + Inches(0.7), w - 2 * inset, h - Inches(0.95) - inset, item.get("text"), 16)
+
+
+def _quote(p, slide, author):
+    if not slide["quote"]:
+        return _statement(p, slide, author)
+    p.text(MARGIN - Inches(0.3), Inches(0.2), Inches(3), Inches(3), "“", 200, color="accent", display=True)
+    p.text(MARGIN + Inches(0.4), Inches(2), _width() - Inches(0.8), Inches(3), slide["quote"], 32, italic=True)
+    if slide["quote_author"]:
+        p.box(MARGIN + Inches(0.4), Inches(5.3), Inches(0.9), Emu(38100), "accent2")
+        p.text(MARGIN + Inches(0.4), Inches(5.5), _width(), Inches(0.5), slide["quote_author"].upper(), 14, color="muted")
+
+
+def _timeline(p, slide, author):
+    items = [t for t in slide["timeline_items"] if isinstance(t, dict)]
+    if not items:
+        return _split(p, slide, author)
+    _heading(p, slide)
+    items = items[:6]
+    step = _width() // len(items)
+    line_y = Inches(3.4)
+    p.box(MARGIN, line_y, _width(), Emu(25400), "accent")
+    dot = Inches(0.22)
+    for i, item in enumerate(items):
+        x = MARGIN + i * step
+        p.text(x, line_y - Inches(0.8), step - Inches(0.2), Inches(0.7), item.get("year"), 26, color="accent",
+               display=True, anchor=MSO_ANCHOR.BOTTOM)
+        p.box(x, line_y - dot // 2, dot, dot, "accent2", MSO_SHAPE.OVAL)
+        p.text(x, line_y + Inches(0.4), step - Inches(0.25), Inches(2.6), item.get("event"), 15, color="muted")
+
+
+def _stats(p, slide, author):
+    items = [s for s in slide["stats"] if isinstance(s, dict)]
+    if not items:
+        return _split(p, slide, author)
+    _heading(p, slide)
+    items = items[:4]
+    cols = 2 if len(items) == 4 else len(items)
+    rows = 2 if len(items) == 4 else 1
+    w = _width() // cols
+    h = (SLIDE_HEIGHT - Inches(2.4)) // rows
+    size = 60 if rows == 2 else 80
+    for i, item in enumerate(items):
+        x = MARGIN + (i % cols) * w
+        y = Inches(2.1) + (i // cols) * h
+        p.text(x, y, w - Inches(0.3), h * 3 // 5, item.get("value"), size, color="accent", display=True,
+               anchor=MSO_ANCHOR.BOTTOM)
+        p.text(x, y + h * 3 // 5, w - Inches(0.3), h * 2 // 5, item.get("label"), 16, color="muted")
+
+
+LAYOUTS = {
+    "title": _hero,
+    "closing": _hero,
+    "statement": _statement,
+    "split": _split,
+    "grid": _grid,
+    "quote": _quote,
+    "timeline": _timeline,
+    "stats": _stats,
+}
+
+
+def export_pptx(slides, theme=None, author=""):
+    """Build a native, editable .pptx from normalized slides; returns the file bytes."""
+    theme = theme or DEFAULT_THEME
+    prs = Presentation()
+    prs.slide_width = SLIDE_WIDTH
+    prs.slide_height = SLIDE_HEIGHT
+    for slide in slides:
+        kind = slide["type"] if slide["type"] in LAYOUTS else "statement"
+        page = prs.slides.add_slide(prs.slide_layouts[BLANK_LAYOUT])
+        LAYOUTS[kind](_Painter(page, theme), slide, (author or "").strip())
+    prs.core_properties.title = slides[0].get("title", "") if slides else ""
+    prs.core_properties.author = author or ""
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+
+def write_pptx(path, slides, theme=None, author=""):
+    data = export_pptx(slides, theme, author)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
@@ -0,0 +1,414 @@
+import json
+import threading
+
+from llm import CONTINUATION_TAIL_CHARS, estimate_tokens
+from render import BULLET_STYLES, MOTIFS, SLIDES_MARKER
+
+# ── Static instruction blocks ──────────────────────────────────────────────────
+# These never change between requests. Every prompt leads with its static part
+# and ends with the per-request data, so identical prefixes can be served from
+# the provider's prompt cache and only the tail is new input.
+
+SCHEMA_BLOCK = """Each slide is an object with these fields:
+{
+  "index": 0,
+  "type": "title" | "statement" | "split" | "grid" | "quote" | "timeline" | "stats" | "closing",
+  "title": "short punchy title",
+  "subtitle": "optional tagline or empty string",
+  "body": "one punchy paragraph OR empty string",
+  "bullets": ["short point", "short point"],
+  "stats": [{"value": "82%", "label": "of companies use AI"}],
+  "quote": "the quote text or empty string",
+  "quote_author": "Name, Title or empty string",
+  "grid_items": [{"icon": "🚀", "text": "short label"}],
+  "timeline_items": [{"year": "2020", "event": "short description"}],
+  "accent_word": "one impactful word from the title"
+}
+
+STRICT RULES:
+- Slide index 0 MUST be type "title"
+- Last slide MUST be type "closing"
+- Use a VARIETY of types across the deck — no same type twice in a row
+- body and bullets should NOT both be filled — pick one or neither
+- Keep all text SHORT and PUNCHY — this is a visual slideshow not an essay
+- stats slides: 2-4 dramatic numbers with context labels
+- grid slides: exactly 4-6 items with relevant emojis as icons
+- quote slides: a real or well-paraphrased relevant quote
+- timeline slides: 4-5 key events in chronological order
+- For unused fields use empty string "" or empty array []"""
+
+DESIGN_BLOCK = """━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+VISUAL DESIGN — INVENT FROM SCRATCH
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Design a unique visual identity. You must choose:
+
+1. COLOR PALETTE — 2-3 main colors + neutrals. Be bold and specific. Examples of directions:
+   - Deep navy + electric lime + white
+   - Warm cream + burnt sienna + dark chocolate  
+   - Pure black + hot magenta + silver
+   - Forest green + gold + off-white
+   - Rich indigo + coral + soft grey
+   NOT generic blue/purple gradients. Pick something with personality.
+
+2. TYPOGRAPHY — Two Google Fonts. Examples of pairings:
+   - Bebas Neue (titles) + Lato (body)
+   - Playfair Display (titles) + DM Sans (body)
+   - Anton (titles) + IBM Plex Sans (body)
+   - Fraunces (titles) + Inter (body)
+   - Clash Display (titles) + Manrope (body)
+   Import via @import in <style>.
+
+3. SIGNATURE GRAPHIC MOTIF — one recurring visual element across ALL slides. Pick ONE:
+   - Large diagonal color band slicing across corner of each slide
+   - Floating abstract SVG blob shapes as background accents
+   - Fine dot-grid pattern as slide background texture (CSS radial-gradient dots)
+   - Oversized blurred circle gradients in background corners
+   - Bold geometric half-circle or quarter-circle decorative element
+   - Thin rule lines framing content areas
+   - Large faded watermark numeral (slide number) in background
+   - Noise/grain texture overlay (SVG feTurbulence or CSS)
+   The motif must appear consistently but subtly on every slide."""
+
+LAYOUTS_BLOCK = """━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+SLIDE LAYOUTS — ONE PER TYPE
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Each type gets a DISTINCT, purpose-built layout:
+
+"title" →
+  Full-bleed hero. Title is MASSIVE (8-12vw). Centered or left-aligned with dramatic spacing.
+  Subtitle below in lighter weight. "by AUTHOR" as small elegant byline.
+  Use the signature motif prominently here.
+
+"statement" →
+  ONE big sentence dominates 70-80% of the slide area.
+  Font size: 5-8vw. Minimal everything else — maybe just a thin rule or accent color block.
+  The text IS the design on this slide.
+
+"split" →
+  Exactly 50/50 vertical split.
+  Left panel: title + body text OR bullet rows.
+  Right panel: pure visual design — a large solid color block, big SVG abstract shape,
+  oversized accent word (10-15vw, barely visible), geometric art, gradient — NO body text on right.
+
+"grid" →
+  Render grid_items as cards in CSS grid (2x2 or 2x3 depending on count).
+  Each card: big emoji (2-3rem) + label text. Cards have subtle border or background.
+  Title above the grid.
+
+"quote" →
+  Giant decorative quotation mark as a design element — large, accent color, positioned behind text.
+  Quote text: large, elegant, italic, centered or left-aligned.
+  Attribution: small, below, with a thin decorative rule above it.
+
+"timeline" →
+  Render timeline_items with a real visual timeline.
+  Option A: horizontal line with dots, years above, events below.
+  Option B: vertical line on left, year labels on left, event text on right.
+  Use accent color for dots/line. Animate items in sequentially.
+
+"stats" →
+  2-4 stats arranged dramatically. Each stat: number in HUGE font (10-15vw), label in small font below.
+  Arrange in a row or 2x2 grid. Numbers count up from 0 on slide enter (JS).
+  Background can use a bold color or the signature motif prominently.
+
+"closing" →
+  Similar energy and layout to the title slide — mirrors it visually.
+  Strong closing message. Can show title + subtitle + body.
+  Give it a sense of completion/resolution.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+CONTENT RENDERING RULES
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+- NEVER use <ul> or <li> — banned entirely
+- If a slide has "bullets" array, render each as a styled <div> row. Options:
+    Numbered: large accent-colored number + text side by side
+    Icon rows: a small square/dot/dash in accent color + text
+    Pill tags: each bullet as a rounded pill/badge
+    Card rows: each bullet in its own mini card with subtle background
+  Choose whichever fits the overall design aesthetic.
+- "body" text: render as a styled paragraph, large enough to read comfortably
+- accent_word: use this word in the title with accent color highlight"""
+
+NAV_BLOCK = """━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+NAVIGATION
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+- Left/right arrow buttons — styled to match the design (not default browser buttons)
+  Position them at left/right edges or bottom center of screen
+- Keyboard: ArrowLeft = prev, ArrowRight / Space = next, Home = first, End = last
+- Click anywhere on slide = next slide (use event delegation, exclude nav buttons with stopPropagation)
+- Touch swipe: touchstart + touchend listeners, if Math.abs(deltaX) > 50 navigate
+- Slide counter "3 / 10" — elegant typography, positioned in a corner, styled to theme
+- Progress bar: thin (3-4px), full width, top or bottom of viewport, fills as slides advance
+- JS structure: currentIndex variable, totalSlides, goTo(n), next(), prev() functions
+- On goTo: hide current slide (display:none or remove 'active' class), show new slide, update counter + progress"""
+
+ANIMATIONS_ON_BLOCK = """━━━ ANIMATIONS ━━━
+Use CSS @keyframes triggered by JavaScript adding class "active" to the visible slide div.
+Only the active slide animates — others are display:none.
+
+Per slide type entrance animations:
+- title: h1 does scale(1.15)→scale(1) + blur(10px)→blur(0) + opacity 0→1 over 0.7s
+- statement: giant text slams in with translateY(40px)→0 + opacity 0→1, slight overshoot
+- split: left panel slides from translateX(-60px)→0, right panel from translateX(60px)→0, simultaneously
+- grid: each card scales from 0.8→1 + opacity 0→1, staggered 0.08s delay per card
+- quote: quotation mark symbol scales in first (0.5s), then quote text fades up (delay 0.4s)
+- stats: numbers count up from 0 to their value using JS requestAnimationFrame on slide enter
+- timeline: items fade+slide in sequentially from left, 0.15s stagger
+- closing: same as title
+
+Body text / bullet rows: each staggered, translateY(20px)→0, opacity 0→1, 0.1s delay increments
+
+FX Toggle button:
+- Fixed position, bottom-right corner, z-index 9999
+- Small elegant pill button, id="fx-btn"
+- Toggles class "no-anim" on <body>
+- CSS: body.no-anim * { animation-duration:0.001s !important; transition-duration:0.001s !important; }
+- Shows "✨ FX" when animations ON, "○ FX" when OFF
+- Default state: animations ON"""
+
+ANIMATIONS_OFF_BLOCK = """━━━ ANIMATIONS ━━━
+No animations. Everything appears instantly when slide becomes active.
+Still include the #fx-btn toggle button (bottom-right), default state OFF showing "○ FX".
+User can click to enable if they want."""
+
+TECHNICAL_BLOCK = """━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+TECHNICAL REQUIREMENTS
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+- Single self-contained HTML file — zero external JS libraries
+- Google Fonts via @import in CSS — allowed
+- Each slide: <div class="slide" id="slide-N"> with N counting from 0 — only one visible at a time
+- 100vw x 100vh, overflow:hidden on body
+- All TOTAL SLIDES slides must be present and fully rendered
+- Mobile responsive — works on phones
+- File opens by double-clicking in any browser"""
+
+HTML_OUTPUT_BLOCK = """━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+OUTPUT
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Return ONLY the raw HTML file.
+Start with <!DOCTYPE html>
+NO markdown. NO code fences. NO explanation. Just the HTML."""
+
+SHELL_CONTRACT_BLOCK = f"""━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+SHELL CONTRACT
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+- Put this exact marker inside <body> where the slides belong: {SLIDES_MARKER}
+- Slides are injected as <div class="slide slide-TYPE" id="slide-N">, N counting from 0, TYPE one of:
+  title, statement, split, grid, quote, timeline, stats, closing
+- Write the CSS for every layout above. At the top of the <style> block, add a CSS comment listing
+  the class names to use for each slide type, e.g. /* grid: .grid-cards > .card > .card-icon + .card-label */
+- Stats numbers will carry class "stat-value" and a data-value attribute — count those up on slide enter
+- The script must collect slides with document.querySelectorAll('.slide') at runtime and never hard-code a count
+- Put all JS in a single <script> placed after the marker; show the first slide on load
+- The shell is reused for other decks with the same mood: no topic-specific text, names or bylines
+  anywhere in it, and <title>Slideshow</title>"""
+
+THEME_BLOCK = f"""Return ONLY a JSON object, no markdown, no explanation:
+{{
+  "palette": {{"bg": "#hex", "surface": "#hex", "text": "#hex", "muted": "#hex", "accent": "#hex", "accent2": "#hex"}},
+  "fonts": {{"display": "Google Font for titles", "body": "Google Font for body text"}},
+  "motif": {" | ".join(f'"{m}"' for m in MOTIFS)},
+  "bullet_style": {" | ".join(f'"{b}"' for b in BULLET_STYLES)}
+}}
+
+RULES:
+- Bold, specific palette with personality — NOT generic blue/purple gradients
+- text must be clearly readable on bg and surface; accent must pop against bg
+- fonts must be real Google Fonts, e.g. Bebas Neue + Lato, Playfair Display + DM Sans, Anton + IBM Plex Sans, Fraunces + Inter"""
+
+FRAGMENT_RULES_BLOCK = """RULES:
+- Return ONLY one element and its children: <div class="slide slide-TYPE" id="slide-INDEX"> ... </div>,
+  with TYPE and INDEX taken from the slide JSON at the end
+- Use that type's layout from the stylesheet, fully rendered with the slide's content
+- NEVER use <ul> or <li> — render bullets as styled <div> rows
+- Stats numbers: <div class="stat-value" data-value="VALUE">VALUE</div>
+- accent_word: highlight it in the title with the accent color
+- No <script>, no <style>, no markdown, no code fences, no explanation."""
+
+CONTINUE_BLOCK = """Continue EXACTLY from the last character shown at the end — do not repeat it, do not start over. No markdown, no explanation.
+Keep using the same classes, styles and structure."""
+
+
+def compact_slide(slide):
+    """Drop empty fields; the model gets the schema separately and doesn't need the blanks."""
+    return {k: v for k, v in slide.items() if v not in ("", [], None, {})}
+
+
+def compact_slides(slides):
+    """One compact JSON object per line: no indentation, no empty fields."""
+    return "[\n" + ",\n".join(
+        json.dumps(compact_slide(s), ensure_ascii=False, separators=(",", ":")) for s in slides
+    ) + "\n]"
+
+
+# ── Builder ────────────────────────────────────────────────────────────────────
+class PromptBuilder:
+    """Every prompt one deck needs, built from that deck's options.
+
+    Input token estimates are tallied per stage as prompts are built; report()
+    returns them for display. html(..., record=False) builds the full-deck
+    prompt without tallying it, for sizing a call that may not be sent.
+    """
+
+    def __init__(self, topic, tone, num_slides, author, mood="", animations=True, advance_secs=0):
+        self.topic = topic.strip()
+        self.tone = tone
+        self.num_slides = num_slides
+        self.author = author.strip()
+        self.mood = mood.strip()
+        self.animations = animations
+        self.advance_secs = advance_secs
+        self.sizes = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, text):
+        with self._lock:
+            calls, tokens = self.sizes.get(stage, (0, 0))
+            self.sizes[stage] = (calls + 1, tokens + estimate_tokens(text))
+        return text
+
+    def report(self):
+        with self._lock:
+            return [{"stage": stage, "calls": calls, "input_tokens": tokens} for stage, (calls, tokens) in self.sizes.items()]
+
+    @property
+    def mood_line(self):
+        if self.mood:
+            return f'Mood/vibe requested by user: "{self.mood}" — honor this strongly.'
+        return "No mood hint given — go wild. Invent something bold, unique, and memorable. Surprise the user."
+
+    @property
+    def options_block(self):
+        animations = ANIMATIONS_ON_BLOCK if self.animations else ANIMATIONS_OFF_BLOCK
+        if self.advance_secs:
+            auto = f"""━━━ AUTO-ADVANCE ━━━
+After setting up navigation, add this:
+setInterval(() => {{ if (currentIndex < totalSlides - 1) goTo(currentIndex + 1); }}, {self.advance_secs * 1000});"""
+        else:
+            auto = "// No auto-advance."
+        return f"{animations}\n\n{auto}"
+
+    # ── Content ──
+    def content(self):
+        return self.record("content", f"""You are a world-class presentation writer.
+
+Return ONLY a valid JSON array of slides. No markdown, no explanation, no code fences.
+
+{SCHEMA_BLOCK}
+
+Topic: {self.topic}
+Tone: {self.tone}
+Slides: {self.num_slides}
+Author: {self.author}
+
+Write exactly {self.num_slides} slides. Return the JSON array only.""")
+
+    def regen(self, slides, bad, indexes):
+        outline = "\n".join(f'{s["index"]}: {s["type"] or "?"} — {s["title"]}' for s in slides if s["index"] not in bad)
+        fixes = "\n".join(f"- index {n}: {'; '.join(bad[n])}" for n in indexes)
+        return self.record("repair", f"""You are a world-class presentation writer fixing a few slides in an existing deck.
+
+Return ONLY a JSON array with one slide object per index listed at the end, each with its "index" field set. No markdown, no explanation, no code fences.
+
+{SCHEMA_BLOCK}
+
+Topic: {self.topic}
+Tone: {self.tone}
+Slides: {self.num_slides}
+Author: {self.author}
+
+THE REST OF THE DECK (index: type — title):
+{outline}
+
+REWRITE ONLY THESE {len(indexes)} SLIDES:
+{fixes}""")
+
+    # ── Design ──
+    def theme(self):
+        return self.record("theme", f"""You are an elite presentation designer. Invent a visual theme for a slideshow.
+
+{THEME_BLOCK}
+
+Topic: {self.topic}
+Tone: {self.tone}
+{self.mood_line}""")
+
+    def html(self, slides, record=True):
+        text = f"""You are an elite front-end designer and creative director. Generate a complete, self-contained, production-quality HTML5 slideshow file from the slide data at the end.
+
+{DESIGN_BLOCK}
+
+{LAYOUTS_BLOCK}
+
+{NAV_BLOCK}
+
+{TECHNICAL_BLOCK}
+
+{HTML_OUTPUT_BLOCK}
+
+{self.options_block}
+
+{self.mood_line}
+
+AUTHOR: {self.author}
+TOTAL SLIDES: {len(slides)}
+
+SLIDE DATA (JSON, empty fields omitted):
+{compact_slides(slides)}"""
+        return self.record("design", text) if record else text
+
+    def continue_deck(self, text, problems, remaining):
+        todo = f"SLIDES STILL TO WRITE (JSON):\n{compact_slides(remaining)}\n" if remaining else ""
+        return self.record("design continuation", f"""You were writing a complete, self-contained HTML5 slideshow file and your output was cut off. The END of what you wrote so far is below.
+
+{CONTINUE_BLOCK}
+Write every remaining <div class="slide" id="slide-N">, close all open tags and the <script> block, and end with </html>.
+{"" if "<script" in text else NAV_BLOCK}
+
+Still to fix: {"; ".join(problems) or "the file was cut off"}.
+{todo}
+━━━ END OF YOUR OUTPUT SO FAR ━━━
+{text[-CONTINUATION_TAIL_CHARS:]}""")
+
+    def shell(self):
+        return self.record("shell", f"""You are an elite front-end designer and creative director. Generate the SHELL of a self-contained, production-quality HTML5 slideshow: every style, the navigation script and the signature motif — but NO slide content. The slides are written separately and injected into your shell.
+
+{DESIGN_BLOCK}
+
+{LAYOUTS_BLOCK}
+
+{NAV_BLOCK}
+
+{SHELL_CONTRACT_BLOCK}
+
+{HTML_OUTPUT_BLOCK}
+
+{self.options_block}
+
+{self.mood_line}
+
+TONE: {self.tone}""")
+
+    def continue_shell(self, text, problems):
+        return self.record("shell continuation", f"""You were writing the shell of a self-contained HTML5 slideshow (all CSS + navigation JS, slides injected at {SLIDES_MARKER}) and your output was cut off. The END of what you wrote so far is below.
+
+{CONTINUE_BLOCK}
+Finish the remaining CSS, the {SLIDES_MARKER} marker if not written yet, the single <script> block, and end with </html>.
+{"" if "<script" in text else NAV_BLOCK}
+
+Still to fix: {"; ".join(problems) or "the file was cut off"}.
+
+━━━ END OF YOUR OUTPUT SO FAR ━━━
+{text[-CONTINUATION_TAIL_CHARS:]}""")
+
+    def fragment(self, slide, css, total):
+        return self.record("slides", f"""You are writing ONE slide for an existing HTML slideshow. Its stylesheet is below — use its class names and layouts; add inline styles only when nothing fits.
+
+{FRAGMENT_RULES_BLOCK}
+
+STYLESHEET:
+{css}
+
+AUTHOR: {self.author}
+SLIDE {slide["index"] + 1} OF {total} (JSON, empty fields omitted):
+{json.dumps(compact_slide(slide), ensure_ascii=False, separators=(",", ":"))}""")
@@ -0,0 +1,221 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+GROQ_RPM = float(os.environ.get("GROQ_RPM", "30"))
+GROQ_TPM = float(os.environ.get("GROQ_TPM", "60000"))
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, retry_in):
+        super().__init__(f"Upstream is unavailable — failing fast for another {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def status_code(exc):
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code
+
+
+def retry_after(exc):
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc):
+    """429s, 5xx and dropped connections are worth retrying; other 4xx are our fault."""
+    code = status_code(exc)
+    if code is not None:
+        return code == 429 or code >= 500
+    return isinstance(exc, (ConnectionError, TimeoutError)) or type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def is_outage(exc):
+    """5xx and dropped connections mean upstream is down; a 429 means it's up and pacing us."""
+    return is_retryable(exc) and status_code(exc) != 429
+
+
+# ── Token buckets ──────────────────────────────────────────────────────────────
+class TokenBucket:
+    """Bucket refilling at `per_minute / 60` per second up to `per_minute`.
+
+    The level may go negative when a caller settles more than it reserved;
+    later callers simply wait longer.
+    """
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.clock = clock
+        self.level = per_minute
+        self._stamp = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_for(self, amount):
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class RateLimiter:
+    """Process-wide limiter sized in both requests and (estimated) tokens per minute.
+
+    Callers are served strictly first-come first-served; while waiting,
+    on_wait(position, seconds) reports their 1-based place in the queue and
+    the expected wait once they reach the front.
+    """
+
+    def __init__(self, rpm=GROQ_RPM, tpm=GROQ_TPM, clock=time.monotonic):
+        self.requests = TokenBucket(rpm, clock)
+        self.tokens = TokenBucket(tpm, clock)
+        self._cond = threading.Condition()
+        self._queue = deque()
+
+    def acquire(self, tokens, on_wait=None, poll=0.5):
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    position = self._queue.index(ticket)
+                    wait = None
+                    if position == 0:
+                        wait = max(self.requests.wait_for(1), self.tokens.wait_for(tokens))
+                        if wait <= 0:
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            return
+                if on_wait:
+                    on_wait(position + 1, wait)
+                with self._cond:
+                    self._cond.wait(timeout=min(wait, poll) if wait else poll)
+        finally:
+            with self._cond:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def settle(self, reserved, actual):
+        """Correct a token reservation once the response reports real usage."""
+        with self._cond:
+            self.tokens.take(actual - reserved)
+            self._cond.notify_all()
+
+
+# ── Circuit breaker ────────────────────────────────────────────────────────────
+class CircuitBreaker:
+    """Opens after `threshold` consecutive upstream failures, then fails fast for
+    `reset_after` seconds before letting a single trial call through."""
+
+    def __init__(self, threshold=5, reset_after=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if self.clock() - self.opened_at >= self.reset_after else "open"
+
+    def check(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = self.reset_after - (self.clock() - self.opened_at)
+            if remaining > 0 or self._trial:
+                raise CircuitOpenError(max(remaining, 0))
+            self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+            self._trial = False
+
+
+# ── Upstream guard ─────────────────────────────────────────────────────────────
+class Upstream:
+    """Runs API calls through the rate limiter and circuit breaker, retrying
+    429/5xx/connection failures with full-jitter exponential backoff.
+
+    Only outages (5xx, connection failures) count towards opening the breaker.
+    A failed attempt settles its token reservation at spent() — what it used
+    before failing — or hands all of it back when there is no `spent`."""
+
+    def __init__(self, limiter=None, breaker=None, retries=4, backoff=1.0, max_backoff=20.0, sleep=time.sleep):
+        self.limiter = limiter or RateLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sleep = sleep
+
+    def run(self, fn, tokens, on_wait=None, on_retry=None, can_retry=None, spent=None):
+        """Call fn() once a slot is free. Returns (result, retries_used)."""
+        attempt = 0
+        while True:
+            self.breaker.check()
+            self.limiter.acquire(tokens, on_wait)
+            try:
+                result = fn()
+            except Exception as exc:
+                self.limiter.settle(tokens, spent() if spent else 0)
+                if is_outage(exc):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if not is_retryable(exc):
+                    raise
+                if attempt >= self.retries or (can_retry and not can_retry()):
+                    raise
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                delay = max(delay, retry_after(exc) or 0)
+                attempt += 1
+                if on_retry:
+                    on_retry(attempt, delay, exc)
+                self.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result, attempt
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_upstream():
+    """The process-wide guard shared by every session using the one GROQ_API_KEY."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Upstream()
+        return _default
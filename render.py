@@ -0,0 +1,600 @@
+import html
+import json
+import re
+
+from llm import strip_fences
+
+# ── Theme spec ─────────────────────────────────────────────────────────────────
+MOTIFS = ("diagonal-band", "blobs", "dot-grid", "glow-orbs", "half-circle", "frame-lines", "watermark", "grain")
+BULLET_STYLES = ("numbered", "icon-rows", "pills", "cards")
+PALETTE_KEYS = ("bg", "surface", "text", "muted", "accent", "accent2")
+
+DEFAULT_THEME = {
+    "palette": {
+        "bg": "#0b1d3a", "surface": "#13284d", "text": "#f5f5f0",
+        "muted": "#9aa7bd", "accent": "#c6ff00", "accent2": "#ff5e5b",
+    },
+    "fonts": {"display": "Bebas Neue", "body": "Lato"},
+    "motif": "diagonal-band",
+    "bullet_style": "numbered",
+}
+
+_HEX = re.compile(r'^#(?:[0-9a-fA-F]{3}){1,2}$')
+_FONT = re.compile(r'^[A-Za-z0-9 ]{2,40}$')
+
+
+def normalize_theme(spec):
+    """Clamp a model-written theme spec to known keys, valid colors and safe font names."""
+    spec = spec if isinstance(spec, dict) else {}
+    palette = spec.get("palette") if isinstance(spec.get("palette"), dict) else {}
+    fonts = spec.get("fonts") if isinstance(spec.get("fonts"), dict) else {}
+    theme = {"palette": {}, "fonts": {}}
+    for key in PALETTE_KEYS:
+        value = str(palette.get(key, "")).strip()
+        theme["palette"][key] = value if _HEX.match(value) else DEFAULT_THEME["palette"][key]
+    for key in ("display", "body"):
+        value = str(fonts.get(key, "")).strip()
+        theme["fonts"][key] = value if _FONT.match(value) else DEFAULT_THEME["fonts"][key]
+    motif = spec.get("motif")
+    theme["motif"] = motif if motif in MOTIFS else DEFAULT_THEME["motif"]
+    bullets = spec.get("bullet_style")
+    theme["bullet_style"] = bullets if bullets in BULLET_STYLES else DEFAULT_THEME["bullet_style"]
+    return theme
+
+
+def parse_theme(raw):
+    raw = strip_fences(raw or "")
+    try:
+        spec = json.loads(raw)
+    except json.JSONDecodeError:
+        match = re.search(r'\{.*\}', raw, re.DOTALL)
+        try:
+            spec = json.loads(match.group()) if match else {}
+        except json.JSONDecodeError:
+            spec = {}
+    return normalize_theme(spec)
+
+
+_VAR_ALIASES = {
+    "bg": ("bg", "background", "bg-color", "color-bg"),
+    "surface": ("surface", "card", "panel", "bg2", "color-surface"),
+    "text": ("text", "fg", "foreground", "text-color", "color-text"),
+    "muted": ("muted", "text-muted", "subtle", "color-muted"),
+    "accent": ("accent", "primary", "accent1", "color-accent", "color-primary"),
+    "accent2": ("accent2", "secondary", "accent-2", "color-accent2", "color-secondary"),
+}
+
+
+def _luminance(color):
+    color = color.lstrip("#")
+    if len(color) == 3:
+        color = "".join(c * 2 for c in color)
+    r, g, b = (int(color[i:i + 2], 16) / 255 for i in (0, 2, 4))
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+
+def theme_from_html(doc):
+    """Recover a theme spec from a deck's CSS custom properties (exact for local
+    decks, best effort for model-written ones)."""
+    css = "\n".join(re.findall(r'<style[^>]*>(.*?)</style>', doc or "", re.DOTALL | re.I))
+    props = {k.lower(): v.strip() for k, v in re.findall(r'--([\w-]+)\s*:\s*([^;}]+)', css)}
+    palette = {}
+    for key, names in _VAR_ALIASES.items():
+        palette[key] = next((props[n] for n in names if _HEX.match(props.get(n, ""))), "")
+    if not palette["bg"]:
+        match = re.search(r'\bbody\s*\{[^}]*?background(?:-color)?\s*:\s*(#[0-9a-fA-F]{3,6})\b', css)
+        palette["bg"] = match.group(1) if match else ""
+    if palette["bg"] and not palette["text"]:
+        palette["text"] = "#111111" if _luminance(palette["bg"]) > 0.5 else "#f5f5f0"
+    palette["surface"] = palette["surface"] or palette["bg"]
+    palette["muted"] = palette["muted"] or palette["text"]
+    fonts = {}
+    for key in ("display", "body"):
+        match = re.match(r'["\']?([^"\',]+)', props.get(f"font-{key}", ""))
+        fonts[key] = match.group(1).strip() if match else ""
+    return normalize_theme({"palette": palette, "fonts": fonts})
+
+
+# ── Slide templates ────────────────────────────────────────────────────────────
+def _e(text):
+    return html.escape(str(text or ""))
+
+
+def _accented(title, accent_word):
+    text = _e(title)
+    word = _e(accent_word).strip()
+    if not word:
+        return text
+    return re.sub(re.escape(word), lambda m: f'<span class="accent">{m.group()}</span>', text, count=1, flags=re.I)
+
+
+def _bullets(items):
+    rows = "".join(
+        f'<div class="bullet" style="--i:{i}"><span class="bullet-mark">{i + 1:02d}</span>'
+        f'<span class="bullet-text">{_e(item)}</span></div>'
+        for i, item in enumerate(items) if str(item).strip()
+    )
+    return f'<div class="bullets">{rows}</div>' if rows else ""
+
+
+def _copy(slide):
+    if slide["bullets"]:
+        return _bullets(slide["bullets"])
+    if slide["body"]:
+        return f'<p class="body">{_e(slide["body"])}</p>'
+    return ""
+
+
+def _heading(slide, tag="h2"):
+    return f'<{tag} class="slide-title">{_accented(slide["title"], slide["accent_word"])}</{tag}>'
+
+
+def _hero(slide, author):
+    subtitle = f'<p class="subtitle">{_e(slide["subtitle"])}</p>' if slide["subtitle"] else ""
+    body = _copy(slide) if slide["type"] == "closing" else ""
+    byline = f'<p class="byline">by {_e(author)}</p>' if author else ""
+    return f'<div class="hero">{_heading(slide, "h1")}{subtitle}{body}{byline}</div>'
+
+
+def _statement(slide, author):
+    if slide["body"]:
+        return f'<div class="statement"><p class="kicker">{_e(slide["title"])}</p><h2 class="statement-text">{_e(slide["body"])}</h2></div>'
+    text = _accented(slide["title"], slide["accent_word"])
+    return f'<div class="statement"><h2 class="statement-text">{text}</h2>{_copy(slide)}</div>'
+
+
+def _split(slide, author):
+    word = slide["accent_word"] or slide["title"].split(" ")[0]
+    return (
+        f'<div class="split"><div class="split-left">{_heading(slide)}{_copy(slide)}</div>'
+        f'<div class="split-right"><span class="giant-word">{_e(word)}</span></div></div>'
+    )
+
+
+def _grid(slide, author):
+    items = [g for g in slide["grid_items"] if isinstance(g, dict)]
+    if not items:
+        return _split(slide, author)
+    cards = "".join(
+        f'<div class="card" style="--i:{i}"><div class="card-icon">{_e(g.get("icon"))}</div>'
+        f'<div class="card-text">{_e(g.get("text"))}</div></div>'
+        for i, g in enumerate(items)
+    )
+    return f'<div class="stack">{_heading(slide)}<div class="grid grid-{min(len(items), 6)}">{cards}</div></div>'
+
+
+def _quote(slide, author):
+    if not slide["quote"]:
+        return _statement(slide, author)
+    cite = f'<div class="quote-rule"></div><cite>{_e(slide["quote_author"])}</cite>' if slide["quote_author"] else ""
+    return f'<div class="quote"><div class="quote-mark">&ldquo;</div><blockquote class="quote-text">{_e(slide["quote"])}</blockquote>{cite}</div>'
+
+
+def _timeline(slide, author):
+    items = [t for t in slide["timeline_items"] if isinstance(t, dict)]
+    if not items:
+        return _split(slide, author)
+    rows = "".join(
+        f'<div class="tl-item" style="--i:{i}"><div class="tl-year">{_e(t.get("year"))}</div>'
+        f'<div class="tl-dot"></div><div class="tl-event">{_e(t.get("event"))}</div></div>'
+        for i, t in enumerate(items)
+    )
+    return f'<div class="stack">{_heading(slide)}<div class="timeline">{rows}</div></div>'
+
+
+def _stats(slide, author):
+    items = [s for s in slide["stats"] if isinstance(s, dict)]
+    if not items:
+        return _split(slide, author)
+    cells = "".join(
+        f'<div class="stat" style="--i:{i}"><div class="stat-value" data-value="{_e(s.get("value"))}">{_e(s.get("value"))}</div>'
+        f'<div class="stat-label">{_e(s.get("label"))}</div></div>'
+        for i, s in enumerate(items[:4])
+    )
+    return f'<div class="stack">{_heading(slide)}<div class="stats stats-{min(len(items), 4)}">{cells}</div></div>'
+
+
+LAYOUTS = {
+    "title": _hero,
+    "closing": _hero,
+    "statement": _statement,
+    "split": _split,
+    "grid": _grid,
+    "quote": _quote,
+    "timeline": _timeline,
+    "stats": _stats,
+}
+
+
+def render_slide(slide, author=""):
+    """Render one normalized slide to its <div class="slide" id="slide-N"> fragment.
+
+    Fragments don't depend on the theme (colors, fonts, motif and bullet style
+    all come from CSS variables and body classes), so they can be rendered while
+    the content stream is still running.
+    """
+    kind = slide["type"] if slide["type"] in LAYOUTS else "statement"
+    n = slide["index"]
+    inner = LAYOUTS[kind](slide, author)
+    return (
+        f'<div class="slide slide-{kind}" id="slide-{n}">'
+        f'<div class="motif" data-n="{n + 1:02d}"></div>{inner}</div>'
+    )
+
+
+# ── Deck shell ─────────────────────────────────────────────────────────────────
+_CSS = """
+*{margin:0;padding:0;box-sizing:border-box}
+html,body{width:100vw;height:100vh;overflow:hidden;background:var(--bg);color:var(--text);font-family:var(--font-body)}
+.slide{position:absolute;inset:0;display:none;align-items:center;justify-content:center;padding:6vh 8vw;overflow:hidden}
+.slide.active{display:flex}
+.slide>*:not(.motif){position:relative;z-index:1;max-width:1200px;width:100%}
+.slide-title{font-family:var(--font-display);font-size:clamp(2rem,5vw,4.5rem);line-height:1.05;margin-bottom:3vh;letter-spacing:-.01em}
+.accent{color:var(--accent)}
+.body{font-size:clamp(1rem,1.8vw,1.45rem);line-height:1.6;color:var(--muted);max-width:60ch}
+.hero h1.slide-title{font-size:clamp(3rem,10vw,9rem);margin-bottom:2vh}
+.subtitle{font-size:clamp(1.1rem,2.2vw,1.8rem);color:var(--muted);margin-bottom:4vh}
+.byline{font-size:.95rem;letter-spacing:.25em;text-transform:uppercase;color:var(--accent2)}
+.slide-closing .hero{text-align:center}
+.slide-closing .body{margin:0 auto 4vh}
+.statement-text{font-family:var(--font-display);font-size:clamp(2.2rem,6.5vw,6rem);line-height:1.05}
+.kicker{font-size:.9rem;letter-spacing:.3em;text-transform:uppercase;color:var(--accent);margin-bottom:3vh}
+.slide:has(>.split){padding:0}
+.split{display:grid;grid-template-columns:1fr 1fr;width:100%!important;max-width:none!important;height:100%}
+.split-left{padding:8vh 5vw;display:flex;flex-direction:column;justify-content:center}
+.split-right{background:var(--accent);display:flex;align-items:center;justify-content:center;overflow:hidden}
+.giant-word{font-family:var(--font-display);font-size:clamp(4rem,14vw,13rem);color:var(--bg);opacity:.85;transform:rotate(-8deg);white-space:nowrap}
+.grid{display:grid;gap:2vw;grid-template-columns:repeat(2,1fr)}
+.grid-3,.grid-5,.grid-6{grid-template-columns:repeat(3,1fr)}
+.card{background:var(--surface);border:1px solid color-mix(in srgb,var(--accent) 25%,transparent);border-radius:14px;padding:3vh 2vw}
+.card-icon{font-size:2.6rem;margin-bottom:1.5vh}
+.card-text{font-size:clamp(.95rem,1.5vw,1.25rem);line-height:1.4}
+.quote{text-align:left;position:relative}
+.quote-mark{position:absolute;top:-14vh;left:-2vw;font-family:var(--font-display);font-size:clamp(10rem,26vw,22rem);line-height:1;color:var(--accent);opacity:.35}
+.quote-text{font-size:clamp(1.6rem,3.6vw,3.2rem);font-style:italic;line-height:1.35;position:relative}
+.quote-rule{width:80px;height:3px;background:var(--accent2);margin:4vh 0 2vh}
+cite{font-style:normal;letter-spacing:.15em;text-transform:uppercase;color:var(--muted);font-size:.9rem}
+.timeline{display:grid;grid-auto-flow:column;grid-auto-columns:1fr;position:relative;margin-top:4vh}
+.timeline:before{content:"";position:absolute;left:0;right:0;top:calc(2.2rem + 7px);height:2px;background:var(--accent)}
+.tl-item{padding-right:2vw}
+.tl-year{font-family:var(--font-display);font-size:clamp(1.3rem,2.4vw,2.2rem);color:var(--accent);height:2.2rem}
+.tl-dot{width:16px;height:16px;border-radius:50%;background:var(--accent2);margin:0 0 2vh;position:relative}
+.tl-event{font-size:clamp(.9rem,1.4vw,1.15rem);line-height:1.45;color:var(--muted)}
+.stats{display:grid;grid-auto-flow:column;grid-auto-columns:1fr;gap:3vw}
+.stats-4{grid-auto-flow:row;grid-template-columns:repeat(2,1fr)}
+.stat-value{font-family:var(--font-display);font-size:clamp(3rem,10vw,9rem);line-height:1;color:var(--accent)}
+.stats-4 .stat-value{font-size:clamp(2.5rem,6vw,6rem)}
+.stat-label{font-size:clamp(.9rem,1.4vw,1.2rem);color:var(--muted);margin-top:1vh;max-width:26ch}
+.bullets{display:flex;flex-direction:column;gap:1.6vh}
+.bullet{display:flex;align-items:baseline;gap:1.2vw;font-size:clamp(1rem,1.7vw,1.4rem);line-height:1.4}
+.bullet-mark{font-family:var(--font-display);color:var(--accent);flex:none}
+.bullets-numbered .bullet-mark{font-size:1.6em;min-width:2ch}
+.bullets-icon-rows .bullet-mark{font-size:0;width:12px;height:12px;background:var(--accent);transform:translateY(-2px)}
+.bullets-pills .bullets{flex-direction:row;flex-wrap:wrap}
+.bullets-pills .bullet{border:1.5px solid var(--accent);border-radius:999px;padding:.5em 1.2em}
+.bullets-pills .bullet-mark{display:none}
+.bullets-cards .bullet{background:var(--surface);border-radius:10px;padding:1.6vh 1.4vw}
+.bullets-cards .bullet-mark{font-size:.9em}
+.motif{position:absolute;inset:0;pointer-events:none;z-index:0}
+.motif-diagonal-band .motif:before{content:"";position:absolute;width:70vmax;height:16vmax;background:var(--accent2);opacity:.18;right:-20vmax;top:-4vmax;transform:rotate(-35deg)}
+.motif-blobs .motif:before,.motif-blobs .motif:after{content:"";position:absolute;border-radius:42% 58% 63% 37%/41% 44% 56% 59%;background:var(--accent);opacity:.12;width:38vmax;height:34vmax;right:-10vmax;bottom:-12vmax}
+.motif-blobs .motif:after{background:var(--accent2);width:22vmax;height:20vmax;left:-8vmax;top:-8vmax;right:auto;bottom:auto}
+.motif-dot-grid .motif{background-image:radial-gradient(color-mix(in srgb,var(--muted) 40%,transparent) 1.2px,transparent 1.2px);background-size:26px 26px;opacity:.5}
+.motif-glow-orbs .motif:before,.motif-glow-orbs .motif:after{content:"";position:absolute;width:50vmax;height:50vmax;border-radius:50%;background:var(--accent);filter:blur(120px);opacity:.22;left:-20vmax;top:-20vmax}
+.motif-glow-orbs .motif:after{background:var(--accent2);left:auto;top:auto;right:-22vmax;bottom:-22vmax}
+.motif-half-circle .motif:before{content:"";position:absolute;width:46vmax;height:46vmax;border-radius:50%;border:5vmax solid var(--accent2);opacity:.16;right:-23vmax;bottom:-23vmax}
+.motif-frame-lines .motif:before{content:"";position:absolute;inset:3.5vh 3vw;border:1px solid color-mix(in srgb,var(--muted) 45%,transparent)}
+.motif-watermark .motif:before{content:attr(data-n);position:absolute;right:2vw;bottom:-6vh;font-family:var(--font-display);font-size:38vh;line-height:1;color:var(--text);opacity:.05}
+.motif-grain .motif{opacity:.09;background-image:url("data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='160' height='160'%3E%3Cfilter id='n'%3E%3CfeTurbulence type='fractalNoise' baseFrequency='.85' numOctaves='3'/%3E%3C/filter%3E%3Crect width='100%25' height='100%25' filter='url(%23n)'/%3E%3C/svg%3E")}
+#progress{position:fixed;top:0;left:0;height:4px;background:var(--accent);width:0;transition:width .4s ease;z-index:100}
+#counter{position:fixed;top:2.5vh;right:2.5vw;font-size:.85rem;letter-spacing:.2em;color:var(--muted);z-index:100}
+.nav{position:fixed;bottom:3vh;width:48px;height:48px;border-radius:50%;border:1.5px solid var(--accent);background:color-mix(in srgb,var(--bg) 70%,transparent);color:var(--accent);font-size:1.2rem;cursor:pointer;z-index:100}
+.nav:hover{background:var(--accent);color:var(--bg)}
+#prev{left:2.5vw}#next{left:calc(2.5vw + 60px)}
+#fx-btn{position:fixed;bottom:3vh;right:2.5vw;z-index:9999;border:1px solid var(--muted);background:transparent;color:var(--text);border-radius:999px;padding:.45em 1.1em;font-size:.8rem;cursor:pointer;letter-spacing:.1em}
+@media (max-width:760px){
+  .split{grid-template-columns:1fr;grid-template-rows:2fr 1fr}
+  .grid,.grid-3,.grid-5,.grid-6{grid-template-columns:repeat(2,1fr)}
+  .timeline{grid-auto-flow:row}.timeline:before{display:none}
+  .stats{grid-auto-flow:row}
+}
+@media print{
+  html,body{overflow:visible;height:auto}
+  .slide{display:flex!important;position:relative;height:100vh;page-break-after:always}
+  #progress,#counter,.nav,#fx-btn{display:none}
+}
+"""
+
+_ANIM_CSS = """
+@keyframes hero-in{from{transform:scale(1.15);filter:blur(10px);opacity:0}to{transform:scale(1);filter:blur(0);opacity:1}}
+@keyframes slam{0%{transform:translateY(40px);opacity:0}70%{transform:translateY(-6px);opacity:1}100%{transform:translateY(0)}}
+@keyframes from-left{from{transform:translateX(-60px);opacity:0}to{transform:none;opacity:1}}
+@keyframes from-right{from{transform:translateX(60px);opacity:0}to{transform:none;opacity:1}}
+@keyframes pop{from{transform:scale(.8);opacity:0}to{transform:scale(1);opacity:1}}
+@keyframes rise{from{transform:translateY(20px);opacity:0}to{transform:none;opacity:1}}
+.slide.active .hero h1{animation:hero-in .7s ease-out both}
+.slide.active .hero .subtitle,.slide.active .hero .byline{animation:rise .6s .3s ease-out both}
+.slide.active .statement-text{animation:slam .7s cubic-bezier(.2,.9,.3,1.3) both}
+.slide.active .split-left{animation:from-left .7s ease-out both}
+.slide.active .split-right{animation:from-right .7s ease-out both}
+.slide.active .card{animation:pop .5s calc(var(--i) * .08s) ease-out both}
+.slide.active .quote-mark{animation:pop .5s ease-out both}
+.slide.active .quote-text,.slide.active cite{animation:rise .6s .4s ease-out both}
+.slide.active .tl-item{animation:from-left .5s calc(var(--i) * .15s) ease-out both}
+.slide.active .stat{animation:rise .5s calc(var(--i) * .1s) ease-out both}
+.slide.active .bullet{animation:rise .5s calc(.2s + var(--i) * .1s) ease-out both}
+.slide.active .body{animation:rise .6s .2s ease-out both}
+body.no-anim *{animation-duration:0.001s!important;animation-delay:0s!important;transition-duration:0.001s!important}
+"""
+
+_JS = """
+const slides=[...document.querySelectorAll('.slide')];
+const totalSlides=slides.length;
+let currentIndex=0;
+const bar=document.getElementById('progress'),counter=document.getElementById('counter'),fx=document.getElementById('fx-btn');
+function countUp(slide){
+  if(document.body.classList.contains('no-anim'))return;
+  slide.querySelectorAll('.stat-value').forEach(el=>{
+    const raw=el.dataset.value,m=raw.match(/^(\\D*)([\\d.,]+)(.*)$/);
+    if(!m)return;
+    const target=parseFloat(m[2].replace(/,/g,'')),dec=(m[2].split('.')[1]||'').length,t0=performance.now();
+    function tick(t){
+      const p=Math.min((t-t0)/1200,1),v=target*(1-Math.pow(1-p,3));
+      el.textContent=m[1]+v.toLocaleString(undefined,{minimumFractionDigits:dec,maximumFractionDigits:dec})+m[3];
+      if(p<1)requestAnimationFrame(tick);else el.textContent=raw;
+    }
+    requestAnimationFrame(tick);
+  });
+}
+function goTo(n){
+  if(n<0||n>=totalSlides)return;
+  slides[currentIndex].classList.remove('active');
+  currentIndex=n;
+  slides[n].classList.add('active');
+  counter.textContent=(n+1)+' / '+totalSlides;
+  bar.style.width=((n+1)/totalSlides*100)+'%';
+  countUp(slides[n]);
+}
+function next(){goTo(currentIndex+1)}
+function prev(){goTo(currentIndex-1)}
+document.getElementById('next').addEventListener('click',e=>{e.stopPropagation();next()});
+document.getElementById('prev').addEventListener('click',e=>{e.stopPropagation();prev()});
+fx.addEventListener('click',e=>{
+  e.stopPropagation();
+  const off=document.body.classList.toggle('no-anim');
+  fx.textContent=off?'○ FX':'✨ FX';
+});
+document.addEventListener('click',()=>next());
+document.addEventListener('keydown',e=>{
+  if(e.key==='ArrowRight'||e.key===' '){e.preventDefault();next()}
+  else if(e.key==='ArrowLeft')prev();
+  else if(e.key==='Home')goTo(0);
+  else if(e.key==='End')goTo(totalSlides-1);
+});
+let touchX=null;
+document.addEventListener('touchstart',e=>{touchX=e.changedTouches[0].clientX},{passive:true});
+document.addEventListener('touchend',e=>{
+  if(touchX===null)return;
+  const dx=e.changedTouches[0].clientX-touchX;touchX=null;
+  if(Math.abs(dx)>50)dx<0?next():prev();
+});
+goTo(0);
+"""
+
+
+def _font_url(theme):
+    families = dict.fromkeys([theme["fonts"]["display"], theme["fonts"]["body"]])
+    query = "&".join("family=" + name.replace(" ", "+") for name in families)
+    return f"https://fonts.googleapis.com/css2?{query}&display=swap"
+
+
+def _vars(theme):
+    p = theme["palette"]
+    return (
+        ":root{"
+        + "".join(f"--{key}:{p[key]};" for key in PALETTE_KEYS)
+        + f"--font-display:'{theme['fonts']['display']}',Impact,sans-serif;"
+        + f"--font-body:'{theme['fonts']['body']}',system-ui,sans-serif;"
+        + "}"
+    )
+
+
+def render_deck(fragments, theme, title="Slideshow", animations=True, advance_secs=0):
+    """Wrap rendered slide fragments in the themed, self-contained deck document."""
+    body_classes = [f"motif-{theme['motif']}", f"bullets-{theme['bullet_style']}"]
+    if not animations:
+        body_classes.append("no-anim")
+    auto = (
+        f"setInterval(()=>{{if(currentIndex<totalSlides-1)goTo(currentIndex+1);}},{int(advance_secs) * 1000});"
+        if advance_secs else ""
+    )
+    return (
+        "<!DOCTYPE html>\n<html lang=\"en\"><head><meta charset=\"utf-8\">"
+        "<meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">"
+        f"<title>{_e(title)}</title>"
+        f"<style>@import url('{_font_url(theme)}');{_vars(theme)}{_CSS}{_ANIM_CSS}</style></head>"
+        f"<body class=\"{' '.join(body_classes)}\"><div id=\"progress\"></div><div id=\"counter\"></div>\n"
+        + "\n".join(fragments)
+        + "\n<button class=\"nav\" id=\"prev\" aria-label=\"Previous\">&larr;</button>"
+        "<button class=\"nav\" id=\"next\" aria-label=\"Next\">&rarr;</button>"
+        f"<button id=\"fx-btn\">{'✨ FX' if animations else '○ FX'}</button>"
+        f"<script>{_JS}{auto}</script></body></html>"
+    )
+
+
+# ── Model-written shell + fragments ────────────────────────────────────────────
+SLIDES_MARKER = "<!-- SLIDES -->"
+
+
+def extract_css(shell):
+    return "\n".join(re.findall(r'<style[^>]*>(.*?)</style>', shell, re.DOTALL | re.I)).strip()
+
+
+def clean_fragment(text, index):
+    """Cut a model-written slide down to its <div ... id="slide-N"> element, or None if unusable."""
+    text = strip_fences(text or "")
+    match = re.search(r'<div\b[^>]*\bid=["\']slide-%d["\'][^>]*>' % index, text)
+    if not match:
+        return None
+    end = text.rfind("</div>")
+    if end < match.start():
+        return None
+    fragment = text[match.start():end + len("</div>")]
+    fragment = re.sub(r'<script\b.*?</script>', '', fragment, flags=re.DOTALL | re.I)
+    tag = match.group()
+    if not re.search(r'\bclass=["\'][^"\']*\bslide\b', tag):
+        fixed = re.sub(r'\bclass=(["\'])', r'class=\1slide ', tag, count=1) if "class=" in tag else tag.replace("<div", '<div class="slide"', 1)
+        fragment = fixed + fragment[len(tag):]
+    missing = len(re.findall(r'<div\b', fragment)) - fragment.count("</div>")
+    return fragment + "</div>" * max(missing, 0)
+
+
+# Built-in layouts used inside a model-written shell when a fragment call fails.
+LOCAL_SLIDE = "local-slide"
+_UNSCOPED = ("*", "html", "#", ".nav", ".motif-", ".slide{", ".slide.", ".slide>", "@", " ", "}")
+
+
+def _scope(selector):
+    selector = selector.strip()
+    if selector.startswith(".slide:"):
+        return f".{LOCAL_SLIDE}{selector[len('.slide'):]}"
+    if selector.startswith(".slide-") and " " in selector:
+        return f".{LOCAL_SLIDE}{selector}"
+    return f".{LOCAL_SLIDE} {selector}"
+
+
+def _local_layout_css():
+    rules = []
+    for line in _CSS.strip().splitlines():
+        if line.startswith(_UNSCOPED) or "{" not in line:
+            continue
+        selectors, body = line.split("{", 1)
+        rules.append(",".join(_scope(s) for s in selectors.split(",")) + "{" + body)
+    return "\n".join(rules)
+
+
+_LOCAL_LAYOUT_CSS = _local_layout_css()
+
+
+def local_fragment(slide, author=""):
+    """render_slide for a model-written deck: marked so with_local_css can style it."""
+    return render_slide(slide, author).replace('class="slide ', f'class="slide {LOCAL_SLIDE} ', 1)
+
+
+def with_local_css(doc):
+    """Add the built-in layout CSS, scoped to .local-slide and colored from the
+    document's own palette, so local_fragment slides don't render unstyled."""
+    if f"/* {LOCAL_SLIDE} */" in doc:
+        return doc
+    theme = theme_from_html(doc)
+    style = (f"<style>/* {LOCAL_SLIDE} */@import url('{_font_url(theme)}');"
+             f"{_vars(theme).replace(':root', '.' + LOCAL_SLIDE, 1)}\n{_LOCAL_LAYOUT_CSS}</style>")
+    head = re.search(r'</head>', doc, re.I)
+    if head:
+        return doc[:head.start()] + style + doc[head.start():]
+    return style + doc
+
+
+def assemble_deck(shell, fragments, title=None):
+    """Drop slide fragments into a model-written shell at the slides marker, and
+    give the document `title` when set (shells are shared and titled generically)."""
+    if title:
+        shell = re.sub(r'<title>.*?</title>', lambda _: f"<title>{html.escape(title)}</title>", shell,
+                       count=1, flags=re.I | re.S)
+    slides = "\n".join(fragments)
+    if SLIDES_MARKER in shell:
+        return shell.replace(SLIDES_MARKER, slides, 1)
+    body = re.search(r'<body[^>]*>', shell, re.I)
+    if body:
+        return shell[:body.end()] + "\n" + slides + shell[body.end():]
+    return shell.replace("</html>", slides + "</html>", 1)
+
+
+_SLIDE_OPEN = re.compile(r'<div\b[^>]*\bclass=["\'](?:[^"\']*\s)?slide(?:\s[^"\']*)?["\'][^>]*>', re.I)
+
+
+def _element_end(doc, start):
+    """End offset of the <div> opening at `start`, found by balancing nested divs, or None."""
+    depth = 0
+    for tag in re.finditer(r'<(/?)div\b[^>]*>', doc[start:], re.I):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return start + tag.end()
+    return None
+
+
+def _slide_spans(doc):
+    """(start, end) of each top-level .slide element in document order, up to the first unclosed one."""
+    spans = []
+    for match in _SLIDE_OPEN.finditer(doc):
+        if spans and match.start() < spans[-1][1]:
+            continue
+        end = _element_end(doc, match.start())
+        if end is None:
+            break
+        spans.append((match.start(), end))
+    return spans
+
+
+def count_slides(doc):
+    return len(_slide_spans(doc))
+
+
+def replace_slide(doc, index, fragment):
+    """Swap the `index`-th .slide element (counting from 0) of a finished deck for
+    `fragment`, or return None if the deck has fewer slides.
+
+    Slides are counted in document order rather than looked up by id, since
+    model-written decks don't always number ids from 0; the fragment takes over
+    the old element's id.
+    """
+    spans = _slide_spans(doc)
+    if index >= len(spans):
+        return None
+    start, end = spans[index]
+    old_id = re.search(r'\bid=["\']([^"\']*)["\']', _SLIDE_OPEN.match(doc, start).group())
+    if old_id:
+        fragment = re.sub(r'\bid=["\']slide-\d+["\']', lambda _: f'id="{old_id.group(1)}"', fragment, count=1)
+    return doc[:start] + fragment + doc[end:]
+
+
+def append_slides(doc, fragments):
+    """Add `fragments` after the last .slide element of a deck, e.g. to fill in
+    slides the model never wrote."""
+    slides = "\n".join(fragments)
+    spans = _slide_spans(doc)
+    body = re.search(r'<body[^>]*>', doc, re.I)
+    closing = re.search(r'</body>|</html>', doc, re.I)
+    at = spans[-1][1] if spans else body.end() if body else closing.start() if closing else len(doc)
+    return doc[:at] + "\n" + slides + doc[at:]
+
+
+# ── Structural checks ──────────────────────────────────────────────────────────
+def _unclosed(text, tag):
+    return len(re.findall(r'<%s\b' % tag, text, re.I)) > len(re.findall(r'</%s>' % tag, text, re.I))
+
+
+def document_problems(text):
+    """Problems a continuation can fix: unclosed <style>/<script> blocks, no closing </html>."""
+    problems = []
+    for tag in ("style", "script"):
+        if _unclosed(text, tag):
+            problems.append(f"<{tag}> block not closed")
+    if not re.search(r'</html>\s*$', text, re.I):
+        problems.append("missing closing </html>")
+    return problems
+
+
+def deck_problems(text, total):
+    """Problems a continuation can fix in a full deck. Missing slide-N ids only count
+    while the document is still open — nothing is ever appended after </html>."""
+    problems = document_problems(text)
+    missing = missing_slides(text, total)
+    if problems and missing:
+        problems.append("missing slides " + ", ".join(f"slide-{n}" for n in missing))
+    return problems
+
+
+def missing_slides(text, total):
+    found = set(int(n) for n in re.findall(r'\bid=["\']slide-(\d+)["\']', text))
+    return [n for n in range(total) if n not in found]
@@ -0,0 +1,255 @@
+import json
+import re
+
+SLIDE_TYPES = ("title", "statement", "split", "grid", "quote", "timeline", "stats", "closing")
+
+SLIDE_DEFAULTS = {
+    "type": "statement",
+    "title": "",
+    "subtitle": "",
+    "body": "",
+    "bullets": [],
+    "stats": [],
+    "quote": "",
+    "quote_author": "",
+    "grid_items": [],
+    "timeline_items": [],
+    "accent_word": "",
+}
+
+
+def normalize_slide(slide, index):
+    """Fill in missing fields so renderers never have to guard against KeyError."""
+    out = {"index": index}
+    for key, default in SLIDE_DEFAULTS.items():
+        value = slide.get(key, default)
+        if isinstance(default, list) and not isinstance(value, list):
+            value = []
+        elif isinstance(default, str) and not isinstance(value, str):
+            value = "" if value is None else str(value)
+        out[key] = value
+    out["type"] = out["type"].strip().lower()
+    return out
+
+
+# ── Incremental parser ─────────────────────────────────────────────────────────
+class SlideStreamParser:
+    """Pull slide objects out of a streamed JSON array as soon as each one closes.
+
+    Feed it raw chunks (code fences and all); feed() returns the slides that
+    completed in that chunk. Only top-level objects of the array are parsed, so
+    nested braces and brackets inside strings or sub-arrays are handled. An
+    object that can't be repaired still takes its place in the deck as a slide
+    with an empty type, so validate_slides() flags it for regeneration. An
+    array that doesn't open with an object (say "[8]" in a preamble) is skipped.
+    """
+
+    def __init__(self):
+        self.slides = []
+        self.done = False
+        self._buf = []
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._started = False
+        self._empty = True
+
+    def feed(self, chunk):
+        new = []
+        for ch in chunk:
+            if self.done:
+                break
+            if not self._started:
+                self._started = ch == "["
+                continue
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._buf = [ch]
+                    self._empty = False
+                elif not self._empty and ch == "]":
+                    self.done = True
+                elif self._empty and not ch.isspace():
+                    self._started = ch == "["
+                continue
+            self._buf.append(ch)
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    slide = self._close()
+                    if slide is not None:
+                        new.append(slide)
+        return new
+
+    def _close(self):
+        text = "".join(self._buf)
+        self._buf = []
+        try:
+            obj = json.loads(text)
+        except json.JSONDecodeError:
+            try:
+                obj = json.loads(repair_json(text))
+            except json.JSONDecodeError:
+                obj = {"type": ""}
+        if not isinstance(obj, dict):
+            obj = {"type": ""}
+        slide = normalize_slide(obj, len(self.slides))
+        self.slides.append(slide)
+        return slide
+
+
+# ── Tolerant parsing ───────────────────────────────────────────────────────────
+_OPEN_QUOTES = "\u201c\u201e\u201f"
+_CLOSE_QUOTES = "\u201d"
+_ARRAY_OF_OBJECTS = re.compile(r"\[\s*\{")
+
+
+def repair_json(text):
+    """Fix the JSON defects models commonly produce, without touching string contents.
+
+    Curly quotes used as string delimiters become straight quotes (curly quotes
+    inside a normal string are left alone, straight quotes inside a curly-quoted
+    string are escaped unless they end it) and trailing commas before a closing
+    brace or bracket are dropped.
+    """
+    out = []
+    in_str = None
+    esc = False
+    for i, ch in enumerate(text):
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif in_str == "curly" and ch == '"' and text[i + 1:].lstrip()[:1] not in (",", "}", "]", ":", ""):
+                ch = '\\"'
+            elif (in_str == '"' and ch == '"') or (in_str == "curly" and ch in _CLOSE_QUOTES + '"'):
+                in_str = None
+                ch = '"'
+            out.append(ch)
+            continue
+        if ch == '"' or ch in _OPEN_QUOTES + _CLOSE_QUOTES:
+            in_str = '"' if ch == '"' else "curly"
+            out.append('"')
+        elif ch in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            out.append(ch)
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def parse_slides(raw):
+    """Best-effort list of slide objects from a model reply, possibly truncated or malformed."""
+    text = re.sub(r'^\s*```[a-z]*\s*$', '', raw or "", flags=re.M)
+    start = _ARRAY_OF_OBJECTS.search(text)
+    if start is None:
+        return []
+    decoder = json.JSONDecoder()
+    for candidate in (text, repair_json(text)):
+        begin = _ARRAY_OF_OBJECTS.search(candidate)
+        if begin is None:
+            continue
+        try:
+            value, _ = decoder.raw_decode(candidate, begin.start())
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, list):
+            return [s if isinstance(s, dict) else {"type": ""} for s in value]
+    parser = SlideStreamParser()
+    parser.feed(text[start.start():])
+    return parser.slides
+
+
+# ── Schema validation ──────────────────────────────────────────────────────────
+def _items(slide, key, field):
+    return [x for x in slide[key] if isinstance(x, dict) and str(x.get(field, "")).strip()]
+
+
+def slide_problems(slide, total, prev_type=None):
+    """Schema problems for one normalized slide, per the rules in the content prompt."""
+    index = slide["index"]
+    kind = slide["type"]
+    problems = []
+    if kind not in SLIDE_TYPES:
+        return [f"unknown type {kind!r}" if kind else "unparseable slide"]
+    if index == 0 and kind != "title":
+        problems.append('first slide must be type "title"')
+    if index == total - 1 and kind != "closing":
+        problems.append('last slide must be type "closing"')
+    if prev_type == kind:
+        problems.append(f'same type "{kind}" as the previous slide')
+    if not slide["title"].strip():
+        problems.append("empty title")
+    if kind == "stats" and len(_items(slide, "stats", "value")) < 2:
+        problems.append("stats slide needs 2-4 stats")
+    elif kind == "grid" and len(_items(slide, "grid_items", "text")) < 3:
+        problems.append("grid slide needs 4-6 items")
+    elif kind == "timeline" and len(_items(slide, "timeline_items", "event")) < 3:
+        problems.append("timeline slide needs 4-5 events")
+    elif kind == "quote" and not slide["quote"].strip():
+        problems.append("quote slide has no quote")
+    return problems
+
+
+def fix_slides(slides, expected):
+    """Local repairs that need no model call: trim extra slides (keeping a final
+    closing slide), renumber, and drop body text when bullets are also present."""
+    if len(slides) > expected:
+        tail = slides[-1:] if slides[-1]["type"] == "closing" else []
+        slides = slides[:expected - len(tail)] + tail
+    fixed = []
+    for i, slide in enumerate(slides):
+        slide = normalize_slide(slide, i)
+        if slide["body"] and slide["bullets"]:
+            slide["body"] = ""
+        fixed.append(slide)
+    return fixed
+
+
+def validate_slides(slides, expected):
+    """Map of slide index -> problems, including indexes missing from a short deck."""
+    bad = {}
+    prev = None
+    for slide in slides:
+        problems = slide_problems(slide, expected, prev)
+        if problems:
+            bad[slide["index"]] = problems
+        prev = slide["type"]
+    for index in range(len(slides), expected):
+        bad[index] = ["missing"]
+    return bad
+
+
+def merge_slides(slides, replies, indexes, expected):
+    """Put regenerated slides into the deck at `indexes`, matching on their "index"
+    field when it is usable and falling back to reply order."""
+    slides = list(slides) + [normalize_slide({"type": ""}, i) for i in range(len(slides), expected)]
+    by_index = {}
+    leftovers = []
+    for reply in replies:
+        n = reply.get("index")
+        if isinstance(n, int) and n in indexes and n not in by_index:
+            by_index[n] = reply
+        else:
+            leftovers.append(reply)
+    for n in indexes:
+        if n not in by_index and leftovers:
+            by_index[n] = leftovers.pop(0)
+    for n, reply in by_index.items():
+        slides[n] = normalize_slide(reply, n)
+    return slides
@@ -0,0 +1,127 @@
+import threading
+import time
+from types import SimpleNamespace as NS
+
+import pytest
+
+from ratelimit import CircuitBreaker, CircuitOpenError, RateLimiter, Upstream
+
+
+class APIError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"Error code: {status}")
+        self.status_code = status
+        self.response = NS(status_code=status, headers={"retry-after": retry_after} if retry_after else {})
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def failing(*errors, result="ok"):
+    """fn for Upstream.run that raises each error in turn, then returns result."""
+    errors = list(errors)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+    fn.calls = calls
+    return fn
+
+
+def upstream(clock, threshold=3, retries=4, tpm=1e9):
+    sleeps = []
+    guard = Upstream(RateLimiter(rpm=1e6, tpm=tpm, clock=clock), CircuitBreaker(threshold, 30.0, clock),
+                     retries=retries, sleep=sleeps.append)
+    return guard, sleeps
+
+
+def test_429s_retry_without_opening_the_breaker():
+    clock = Clock()
+    guard, sleeps = upstream(clock, threshold=2)
+    fn = failing(APIError(429, "3"), APIError(429, "3"), APIError(429, "3"))
+    assert guard.run(fn, 100) == ("ok", 3)
+    assert len(sleeps) == 3 and all(s >= 3 for s in sleeps)
+    assert guard.breaker.state == "closed" and guard.breaker.failures == 0
+
+
+def test_429s_give_up_after_retries():
+    guard, sleeps = upstream(Clock(), retries=2)
+    with pytest.raises(APIError):
+        guard.run(failing(*[APIError(429)] * 5), 100)
+    assert len(sleeps) == 2 and guard.breaker.state == "closed"
+
+
+def test_5xx_open_the_breaker_then_a_trial_call_closes_it():
+    clock = Clock()
+    guard, _ = upstream(clock, threshold=3, retries=10)
+    fn = failing(*[APIError(503)] * 10)
+    with pytest.raises(CircuitOpenError):
+        guard.run(fn, 100)
+    assert len(fn.calls) == 3 and guard.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        guard.run(failing(), 100)
+    clock.now += 30
+    assert guard.breaker.state == "half-open"
+    assert guard.run(failing(), 100) == ("ok", 0)
+    assert guard.breaker.state == "closed"
+
+
+def test_client_errors_are_not_retried():
+    guard, sleeps = upstream(Clock())
+    fn = failing(APIError(400))
+    with pytest.raises(APIError):
+        guard.run(fn, 100)
+    assert len(fn.calls) == 1 and not sleeps and guard.breaker.failures == 0
+
+
+def test_failed_attempt_settles_what_it_spent():
+    clock = Clock()
+    guard, _ = upstream(clock, tpm=1000)
+    with pytest.raises(APIError):
+        guard.run(failing(APIError(400)), 500, spent=lambda: 120)
+    assert guard.limiter.tokens.level == 880
+    with pytest.raises(APIError):
+        guard.run(failing(APIError(400)), 500)
+    assert guard.limiter.tokens.level == 880
+
+
+def test_waiting_callers_get_their_queue_position():
+    clock = Clock()
+    limiter = RateLimiter(rpm=1, tpm=1e6, clock=clock)
+    limiter.acquire(1)
+    seen = {"b": [], "c": []}
+    reported = {"b": threading.Event(), "c": threading.Event()}
+
+    def caller(name):
+        def on_wait(position, seconds):
+            seen[name].append((position, seconds))
+            reported[name].set()
+        limiter.acquire(1, on_wait, poll=0.01)
+
+    b = threading.Thread(target=caller, args=("b",), daemon=True)
+    b.start()
+    assert reported["b"].wait(5)
+    c = threading.Thread(target=caller, args=("c",), daemon=True)
+    c.start()
+    assert reported["c"].wait(5)
+    assert seen["b"][0] == (1, pytest.approx(60.0))
+    assert seen["c"][0] == (2, None)
+
+    clock.now = 60.0
+    b.join(5)
+    assert not b.is_alive()
+    deadline = time.monotonic() + 5
+    while seen["c"][-1][0] != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert seen["c"][-1] == (1, pytest.approx(60.0))
+    clock.now = 120.0
+    c.join(5)
+    assert not c.is_alive()
@@ -0,0 +1,36 @@
+from render import append_slides, count_slides, deck_problems, replace_slide
+
+DOC = ('<!DOCTYPE html><html><head></head><body>'
+       '<div class="slide" id="slide-1"><div class="inner">A</div></div>'
+       '<div class="slide active" id="slide-2"><div>B</div></div>'
+       '<script>go(0)</script></body></html>')
+
+
+def test_count_slides_ignores_nested_divs():
+    assert count_slides(DOC) == 2
+
+
+def test_count_slides_stops_at_unclosed_slide():
+    assert count_slides(DOC[:DOC.index("<script>")].replace("<div>B</div></div>", "<div>B")) == 1
+
+
+def test_replace_slide_by_position_keeps_id():
+    out = replace_slide(DOC, 1, '<div class="slide" id="slide-1">New</div>')
+    assert 'id="slide-2">New</div>' in out and ">B<" not in out
+    assert replace_slide(DOC, 2, "<div></div>") is None
+
+
+def test_append_slides_after_last_slide():
+    out = append_slides(DOC, ['<div class="slide" id="slide-3">C</div>'])
+    assert count_slides(out) == 3
+    assert out.index(">C<") < out.index("<script>")
+
+
+def test_append_slides_without_slides():
+    out = append_slides("<html><body></body></html>", ['<div class="slide">C</div>'])
+    assert count_slides(out) == 1 and out.endswith("</body></html>")
+
+
+def test_deck_problems_closed_deck_is_final():
+    assert deck_problems(DOC, 5) == []
+    assert deck_problems(DOC[:-len("</html>")], 3) == ["missing closing </html>", "missing slides slide-0"]
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from slides import SlideStreamParser, fix_slides, normalize_slide, parse_slides, repair_json, validate_slides
+
+
+def deck(*types):
+    return [normalize_slide({"type": kind, "title": f"Slide {i + 1}", "body": "Text."}, i)
+            for i, kind in enumerate(types)]
+
+
+# ── repair_json ────────────────────────────────────────────────────────────────
+@pytest.mark.parametrize("raw, expected", [
+    ('{"a": “he said "hi" to me”}', {"a": 'he said "hi" to me'}),
+    ('{"a": “mixed", "b": 1}', {"a": "mixed", "b": 1}),
+    ('{"a": "a “quoted” word"}', {"a": "a “quoted” word"}),
+    ('[{"a": "x",}, ]', [{"a": "x"}]),
+    ('{"a": [1, 2,\n],\n}', {"a": [1, 2]}),
+    ('{"a": "keep ,} and ,] inside"}', {"a": "keep ,} and ,] inside"}),
+    ('{"a": "esc \\" quote",}', {"a": 'esc " quote'}),
+])
+def test_repair_json(raw, expected):
+    assert json.loads(repair_json(raw)) == expected
+
+
+def test_repair_json_leaves_valid_json_alone():
+    text = json.dumps([{"index": 0, "title": "Hello, world", "bullets": ["a", "b"]}])
+    assert repair_json(text) == text
+
+
+# ── parse_slides ───────────────────────────────────────────────────────────────
+def test_parse_slides_fenced():
+    raw = '```json\n[{"type": "title", "title": "Hi"}]\n```'
+    assert parse_slides(raw) == [{"type": "title", "title": "Hi"}]
+
+
+def test_parse_slides_trailing_comma_and_curly_quotes():
+    raw = 'Here you go:\n[{"type": “title”, "title": "Hi",},]'
+    assert parse_slides(raw) == [{"type": "title", "title": "Hi"}]
+
+
+def test_parse_slides_truncated_keeps_complete_objects():
+    raw = '[{"type": "title", "title": "A"}, {"type": "statement", "title": "B"}, {"type": "clo'
+    assert [s["title"] for s in parse_slides(raw)] == ["A", "B"]
+
+
+def test_parse_slides_non_objects_become_unparseable():
+    assert parse_slides('[{"type": "title"}, "oops"]') == [{"type": "title"}, {"type": ""}]
+
+
+@pytest.mark.parametrize("raw", ["", None, "no json here", "{}"])
+def test_parse_slides_nothing(raw):
+    assert parse_slides(raw) == []
+
+
+# ── validate_slides ────────────────────────────────────────────────────────────
+def test_validate_slides_clean_deck():
+    assert validate_slides(deck("title", "statement", "closing"), 3) == {}
+
+
+def test_validate_slides_reports_missing_indexes():
+    assert validate_slides(deck("title", "statement"), 4) == {2: ["missing"], 3: ["missing"]}
+
+
+def test_validate_slides_first_must_be_title():
+    bad = validate_slides(deck("statement", "split", "closing"), 3)
+    assert bad == {0: ['first slide must be type "title"']}
+
+
+def test_validate_slides_last_must_be_closing_and_types_alternate():
+    bad = validate_slides(deck("title", "statement", "statement"), 3)
+    assert bad == {2: ['last slide must be type "closing"', 'same type "statement" as the previous slide']}
+
+
+def test_validate_slides_unknown_type():
+    slides = deck("title", "closing")
+    slides[1]["type"] = ""
+    assert validate_slides(slides, 2) == {1: ["unparseable slide"]}
+
+
+def test_fix_slides_trims_but_keeps_closing():
+    slides = fix_slides(deck("title", "statement", "split", "closing"), 3)
+    assert [(s["index"], s["type"]) for s in slides] == [(0, "title"), (1, "statement"), (2, "closing")]
+
+
+def test_parse_slides_skips_bracketed_preamble():
+    raw = 'Sure! Here are [8] slides, as [requested]:\n[{"type": "title", "title": "Hi"}]'
+    assert parse_slides(raw) == [{"type": "title", "title": "Hi"}]
+    assert parse_slides(raw[:-1] + ', {"type": "clo') == [normalize_slide({"type": "title", "title": "Hi"}, 0)]
+
+
+def test_stream_parser_skips_bracketed_preamble():
+    parser = SlideStreamParser()
+    chunks = ["Sure! Here are [8", "] slides and [ ] none:\n```json\n[", '  {"type": "title", "title": "A"},',
+              ' {"type": "closing", "title": "B"}]']
+    titles = [s["title"] for chunk in chunks for s in parser.feed(chunk)]
+    assert titles == ["A", "B"] and parser.done
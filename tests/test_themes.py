@@ -0,0 +1,25 @@
+import pytest
+
+from pipeline import DeckRequest
+from themes import mentions_request, normalize_mood
+
+CSS = ("<style>.a { max-width: 10px; width: max(1px, 2vw); vertical-align: middle; "
+       "font-weight: normal; transition: all .2s ease-in-out; }</style>")
+
+
+def request(author, topic="The future of remote work"):
+    return DeckRequest(topic, author)
+
+
+@pytest.mark.parametrize("author", ["Max", "Al", "Ed", "Norma"])
+def test_mentions_request_ignores_css_words(author):
+    assert not mentions_request(CSS, request(author))
+
+
+def test_mentions_request_finds_author_and_topic():
+    assert mentions_request(CSS + "<p>by Max</p>", request("Max"))
+    assert mentions_request("<h1>The Future of Remote Work</h1>", request("Ada"))
+
+
+def test_normalize_mood():
+    assert normalize_mood("Dark & DRAMATIC!") == normalize_mood("dramatic, dark") == "dark dramatic"
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import re
+import threading
+
+from cache import ResponseCache
+
+THEME_DIR = os.environ.get("GENIS_THEME_DIR", ".genis_themes")
+THEME_MEMORY_ENTRIES = int(os.environ.get("GENIS_THEME_ENTRIES", "64"))
+THEME_DISK_MB = float(os.environ.get("GENIS_THEME_MB", "50"))
+
+# Bumped whenever the prompts change what a stored design may contain, so older entries stop matching.
+THEME_VERSION = 2
+
+_FILLER = {"a", "an", "and", "the", "with", "of", "in", "very", "but", "&", "+"}
+
+
+def normalize_mood(mood):
+    """'Dark & DRAMATIC!' and 'dramatic, dark' both become 'dark dramatic'."""
+    words = re.findall(r"[a-z0-9]+", (mood or "").lower())
+    return " ".join(sorted(set(w for w in words if w not in _FILLER)))
+
+
+def theme_key(kind, mood, animations, advance_secs):
+    """Key for a stored design, or None when there's no mood to match on."""
+    mood = normalize_mood(mood)
+    if not mood:
+        return None
+    payload = f"{THEME_VERSION}|{kind}|{mood}|{bool(animations)}|{int(advance_secs or 0)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def mentions_request(text, req):
+    """True when `text` names the request's topic or author — not safe to share with other decks.
+
+    Whole words only, and a hyphen or "(" next to the name doesn't count, so an
+    author called Max doesn't match max-width or max(); names under three
+    letters are too likely to be CSS to check at all.
+    """
+    return any(
+        re.search(r"(?<![\w-])" + re.escape(value) + r"(?![\w(-])", text or "", re.I)
+        for value in (req.topic.strip(), req.author.strip()) if len(value) >= 3
+    )
+
+
+class ThemeStore:
+    """Designs that came out well, reused by later decks with the same mood and options.
+
+    `kind` is "spec" for the local engine's theme JSON and "shell" for the
+    model-written shell (CSS + navigation script) used by the parallel engine.
+    Entries live in a size-capped ResponseCache of their own.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or ResponseCache(THEME_DIR, THEME_MEMORY_ENTRIES, THEME_DISK_MB * 1024 * 1024)
+
+    def get(self, kind, req):
+        key = theme_key(kind, req.mood, req.animations, req.advance_secs)
+        if key is None or req.fresh:
+            return None
+        hit = self.cache.get(key)
+        return hit["value"] if hit else None
+
+    def put(self, kind, req, value):
+        key = theme_key(kind, req.mood, req.animations, req.advance_secs)
+        if key is not None and value:
+            self.cache.put(key, {"mood": normalize_mood(req.mood), "value": value})
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_themes():
+    """The process-wide theme store shared by every session and batch worker."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ThemeStore()
+        return _default